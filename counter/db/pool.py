@@ -0,0 +1,251 @@
+"""Пул соединений с базой для бэкендов counter.db.
+
+Django открывает соединение на каждый запрос (при CONN_MAX_AGE = 0) и
+закрывает его в конце. Бэкенды с пулом вместо этого берут готовое
+соединение из пула процесса и возвращают его обратно, так что каждый
+воркер gunicorn переиспользует свои соединения.
+
+Настройки задаются ключом POOL в DATABASES:
+MIN_SIZE - сколько соединений открыть сразу,
+MAX_SIZE - больше этого числа соединений пул не откроет, следующий
+запрос ждет освободившееся,
+TIMEOUT - сколько секунд ждать соединение,
+CHECK_INTERVAL - соединение, простоявшее без дела дольше, проверяется
+запросом SELECT 1 перед выдачей.
+
+CONN_MAX_AGE у таких баз должен быть 0: соединение возвращается в пул,
+когда Django закрывает его в конце запроса.
+"""
+import gc
+import os
+import threading
+import time
+import weakref
+from contextlib import closing
+
+from django.core.exceptions import ImproperlyConfigured
+
+DEFAULTS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'CHECK_INTERVAL': 30,
+}
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений DB-API.
+
+    connect создает новое соединение, check проверяет старое и бросает
+    исключение, если им нельзя пользоваться.
+    """
+
+    def __init__(self, connect, check, min_size=1, max_size=10, timeout=10,
+                 check_interval=30):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError('Нужно 0 <= MIN_SIZE <= MAX_SIZE и MAX_SIZE > 0')
+        self.connect = connect
+        self.check = check
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.condition = threading.Condition()
+        self.idle = []  # пары (соединение, время возврата)
+        self.size = 0
+        self.stats = PoolStats()
+        self.filled = False
+
+    @property
+    def in_use(self):
+        return self.size - len(self.idle)
+
+    def fill(self):
+        while self.size < self.min_size:
+            self.size += 1
+            self.idle.append((self.open(), time.monotonic()))
+
+    def open(self):
+        """Подключается на место, уже занятое в self.size.
+
+        Подключение идет без блокировки, чтобы медленное открытие
+        соединения не задерживало выдачу свободных.
+        """
+        try:
+            connection = self.connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.stats.created += 1
+        return connection
+
+    def get(self):
+        """Выдает соединение, при нехватке ждет не дольше timeout."""
+        with self.condition:
+            self.stats.checkouts += 1
+            if not self.filled:
+                self.filled = True
+                self.fill()
+        while True:
+            with self.condition:
+                if not self.idle and self.size >= self.max_size:
+                    self.wait()
+                if not self.idle:
+                    self.size += 1
+                    break
+                connection, returned = self.idle.pop()
+            if time.monotonic() - returned < self.check_interval:
+                return connection
+            try:
+                self.check(connection)
+            except Exception:
+                self.discard(connection)
+                continue
+            return connection
+        return self.open()
+
+    def wait(self):
+        self.stats.waits += 1
+        start = time.monotonic()
+        ready = self.condition.wait_for(
+            lambda: self.idle or self.size < self.max_size, self.timeout
+        )
+        self.stats.wait_seconds += time.monotonic() - start
+        if not ready:
+            self.stats.timeouts += 1
+            raise PoolTimeoutError(f'Нет свободного соединения за '
+                                   f'{self.timeout} с, занято {self.size}')
+
+    def put(self, connection):
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection):
+        """Закрывает неисправное соединение и освобождает место в пуле."""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.stats.discarded += 1
+            self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            idle, self.idle = self.idle, []
+        for connection, _ in idle:
+            self.discard(connection)
+
+
+# Пулы текущего процесса: ключ содержит pid, чтобы воркер, созданный
+# fork после открытия пула, не делил соединения с родителем
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, connect, check, options):
+    key = (os.getpid(), alias)
+    with pools_lock:
+        pool = pools.get(key)
+        if pool is None:
+            options = {**DEFAULTS, **options}
+            pool = pools[key] = ConnectionPool(
+                connect, check,
+                min_size=int(options['MIN_SIZE']),
+                max_size=int(options['MAX_SIZE']),
+                timeout=float(options['TIMEOUT']),
+                check_interval=float(options['CHECK_INTERVAL']),
+            )
+        return pool
+
+
+def get_pools():
+    """Пулы текущего процесса по псевдонимам баз."""
+    pid = os.getpid()
+    with pools_lock:
+        return {alias: pool for (owner, alias), pool in pools.items()
+                if owner == pid}
+
+
+def ping(connection):
+    with closing(connection.cursor()) as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+class PooledDatabaseMixin:
+    """Подмешивается к DatabaseWrapper бэкенда Django."""
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        # постоянное соединение потока держало бы место в пуле вечно
+        if settings_dict.get('CONN_MAX_AGE', 0) != 0:
+            raise ImproperlyConfigured(
+                'Для базы с пулом соединений нужен CONN_MAX_AGE = 0'
+            )
+        super().__init__(settings_dict, *args, **kwargs)
+        self.pool_finalizer = None
+
+    def get_pool(self):
+        return get_pool(
+            self.alias,
+            lambda: super(PooledDatabaseMixin, self).get_new_connection(
+                self.get_connection_params()
+            ),
+            ping,
+            self.settings_dict.get('POOL', {}),
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        if not pool.idle and pool.size >= pool.max_size:
+            # брошенные обертки (см. ниже) держат циклические ссылки и
+            # освобождаются только сборщиком мусора
+            gc.collect()
+        try:
+            connection = pool.get()
+        except PoolTimeoutError as error:
+            raise self.Database.OperationalError(str(error)) from error
+        # поток, который завершился, не закрыв соединение, бросает обертку;
+        # тогда соединение закрывается и освобождает место в пуле
+        self.pool_finalizer = weakref.finalize(self, pool.discard,
+                                               connection)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self.pool_finalizer is not None:
+            self.pool_finalizer.detach()
+            self.pool_finalizer = None
+        pool = self.get_pool()
+        # соединение, закрытое посреди транзакции, Django продолжает
+        # держать, поэтому в пул его отдавать нельзя
+        if self.in_atomic_block:
+            pool.discard(self.connection)
+            return
+        try:
+            with self.wrap_database_errors:
+                self.connection.rollback()
+        except Exception:
+            pool.discard(self.connection)
+        else:
+            pool.put(self.connection)
@@ -0,0 +1,7 @@
+from django.db.backends.sqlite3 import base
+
+from counter.db.pool import PooledDatabaseMixin
+
+
+class DatabaseWrapper(PooledDatabaseMixin, base.DatabaseWrapper):
+    """SQLite с пулом соединений для проверки пула без PostgreSQL."""
@@ -0,0 +1,73 @@
+"""Неблокирующее журналирование.
+
+Обработчики в потоках запросов только кладут запись в очередь.
+Форматирование и запись в файл с ротацией выполняет отдельный поток
+QueueListener, поэтому запрос не ждет диска.
+"""
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class QueueFileHandler(QueueHandler):
+    """Пишет записи в RotatingFileHandler через очередь."""
+
+    def __init__(self, filename, max_bytes=0, backup_count=0,
+                 encoding='utf-8'):
+        super().__init__(queue.SimpleQueue())
+        self.target = RotatingFileHandler(filename,
+                                          maxBytes=max_bytes,
+                                          backupCount=backup_count,
+                                          encoding=encoding,
+                                          delay=True)
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):  # noqa: N802
+        # форматирует поток записи, а не поток запроса
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # запись не покидает процесс, поэтому ее не нужно
+        # форматировать и упрощать заранее
+        return record
+
+    def close(self):
+        # logging.shutdown закрывает обработчики при выходе; очередь
+        # дописывается в файл до остановки потока
+        if self.listener._thread is not None:
+            self.listener.stop()
+        self.target.close()
+        super().close()
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Строка «время уровень логгер событие ключ=значение ...»."""
+
+    def __init__(self, fmt='%(asctime)s %(levelname)s %(name)s %(message)s',
+                 datefmt=None, style='%'):
+        super().__init__(fmt, datefmt, style)
+
+    def formatMessage(self, record):  # noqa: N802
+        message = super().formatMessage(record)
+        fields = getattr(record, 'fields', None)
+        if not fields:
+            return message
+        pairs = ' '.join(f'{key}={format_value(value)}'
+                         for key, value in fields.items())
+        return f'{message} {pairs}'
+
+
+def format_value(value):
+    value = str(value)
+    if not value or any(char in value for char in ' "='):
+        return '"{}"'.format(value.replace('"', '\\"'))
+    return value
+
+
+def log_event(logger, event, level=logging.INFO, **fields):
+    """Записывает событие с полями; значения форматируются в потоке
+    записи, поэтому в fields следует передавать готовые значения, а не
+    QuerySet и модели."""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
@@ -47,7 +47,12 @@ INSTALLED_APPS = [
     'users'
 ]
 
+# SlowQueryMiddleware снаружи MetricsMiddleware: записи медленных
+# запросов сохраняются уже после того, как сняты счетчики метрик, и не
+# попадают в число запросов представления
 MIDDLEWARE = [
+    'photos.middleware.SlowQueryMiddleware',
+    'photos.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -94,13 +99,63 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # Сколько секунд держать соединение потока между запросами;
+        # с пулом (DB_ENGINE counter.db.postgresql или counter.db.sqlite3)
+        # допустим только 0: соединение вернется в пул в конце запроса
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        # Пул соединений воркера, см. counter/db/pool.py
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'CHECK_INTERVAL': float(os.getenv('DB_POOL_CHECK_INTERVAL', 30)),
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Кеш в памяти процесса годится только для одного процесса: в
+# продакшене с несколькими воркерами нужен общий кеш (Memcached, Redis,
+# DatabaseCache), иначе записи одного воркера и команд не сбрасывают
+# кеш графиков остальных. См. photos/checks.py.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND',
+                             'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'photos'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 5000)),
+            'CULL_FREQUENCY': 3,
+        },
     }
 }
 
+# Токен для сбора метрик Prometheus без входа персонала
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Порог медленного запроса, мс; пустое значение отключает запись
+PHOTOS_SLOW_QUERY_THRESHOLD_MS = (
+    float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 200))
+    if os.getenv('SLOW_QUERY_THRESHOLD_MS', '200') else None
+)
+# Сколько последних медленных запросов хранить
+PHOTOS_SLOW_QUERY_LIMIT = int(os.getenv('SLOW_QUERY_LIMIT', 500))
+
+# Время жизни закешированных графиков и итогов, секунды
+PHOTOS_RESULT_CACHE_TIMEOUT = 60 * 60
+# Время жизни закешированного списка стоков пользователя, секунды
+PHOTOS_STOCKS_CACHE_TIMEOUT = 60
+
 if 'test' in sys.argv:  # Covers regular testing and django-coverage
     DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
     DATABASES['default']['NAME'] = ':memory:'
+    CACHES['default']['BACKEND'] = (
+        'django.core.cache.backends.dummy.DummyCache'
+    )
 
 
 # Password validation
@@ -163,11 +218,19 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'key_value': {
+            '()': 'counter.log.KeyValueFormatter',
+        },
+    },
     'handlers': {
         'file': {
-            'level': 'WARNING',
-            'class': 'logging.FileHandler',
-            'filename': 'debug.log',
+            'level': 'INFO',
+            'class': 'counter.log.QueueFileHandler',
+            'filename': os.getenv('LOG_FILE', 'debug.log'),
+            'max_bytes': int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+            'backup_count': int(os.getenv('LOG_BACKUP_COUNT', 5)),
+            'formatter': 'key_value',
         },
     },
     'loggers': {
@@ -176,5 +239,10 @@ LOGGING = {
             'level': 'WARNING',
             'propagate': True,
         },
+        'photos': {
+            'handlers': ['file'],
+            'level': os.getenv('LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
     },
 }
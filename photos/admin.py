@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Day, Month, Stock, StockCount
+from .models import (Day, Month, MonthTotal, SlowQuery, Stock, StockCount,
+                     YearTotal)
 
 
 class MonthAdmin(admin.ModelAdmin):
@@ -22,7 +23,36 @@ class StockCountAdmin(admin.ModelAdmin):
     list_display = ('stock', 'day', 'photo', 'video', 'income')
 
 
+class MonthTotalAdmin(admin.ModelAdmin):
+    list_display = ('user', 'stock', 'year', 'month',
+                    'photo', 'video', 'income')
+    list_filter = ('year',)
+
+
+class YearTotalAdmin(admin.ModelAdmin):
+    list_display = ('user', 'year', 'photo', 'video', 'income',
+                    'upload_photo', 'upload_video')
+    list_filter = ('year',)
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('created', 'view', 'duration', 'path')
+    list_filter = ('view',)
+    search_fields = ('sql', 'path')
+    readonly_fields = ('created', 'view', 'path', 'duration', 'sql',
+                       'params', 'explain', 'stack')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(Month, MonthAdmin)
 admin.site.register(Day, DayAdmin)
 admin.site.register(Stock, StockAdmin)
 admin.site.register(StockCount, StockCountAdmin)
+admin.site.register(MonthTotal, MonthTotalAdmin)
+admin.site.register(YearTotal, YearTotalAdmin)
+admin.site.register(SlowQuery, SlowQueryAdmin)
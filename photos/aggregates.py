@@ -0,0 +1,116 @@
+import datetime as dt
+from calendar import monthrange
+
+from django.db.models import Q, Sum
+
+from .cache import cached_result
+from .models import MonthTotal, Stock, StockCount, YearTotal
+from .vars import months_list as months
+
+
+def month_bounds(year, month):
+    year, month = int(year), int(month)
+    return (dt.date(year, month, 1),
+            dt.date(year, month, monthrange(year, month)[1]))
+
+
+def month_graphic(year, month, stock):
+    """Продажи стока по дням месяца, пустые дни заполняются нулями."""
+    rows = (StockCount.objects
+            .filter(stock=stock, date__range=month_bounds(year, month))
+            .values('date')
+            .annotate(photo_sum=Sum('photo'),
+                      video_sum=Sum('video'),
+                      income_sum=Sum('income'))
+            .order_by())
+    days_count = monthrange(int(year), int(month))[1]
+    photoes = [0] * days_count
+    videos = [0] * days_count
+    incomes = [0.0] * days_count
+    for row in rows:
+        index = row['date'].day - 1
+        photoes[index] = row['photo_sum'] or 0
+        videos[index] = row['video_sum'] or 0
+        incomes[index] = row['income_sum'] or 0.0
+    return {'photoes': photoes,
+            'videos': videos,
+            'incomes': incomes,
+            'labels': list(range(1, days_count + 1))}
+
+
+def year_graphic(year, stock):
+    """Помесячные продажи стока за год из помесячных итогов."""
+    rows = (MonthTotal.objects
+            .filter(stock=stock, year=int(year))
+            .values_list('month', 'photo', 'video', 'income'))
+    photoes = [0] * 12
+    videos = [0] * 12
+    incomes = [0.0] * 12
+    for month, photo, video, income in rows:
+        photoes[month - 1] = photo
+        videos[month - 1] = video
+        incomes[month - 1] = income
+    return {'photoes': photoes,
+            'videos': videos,
+            'incomes': incomes,
+            'labels': list(months)}
+
+
+def month_totals(user, year, month):
+    """Продажи за месяц по всем стокам пользователя одним запросом."""
+    in_month = Q(month_total__year=int(year), month_total__month=int(month))
+    stocks = (Stock.objects
+              .filter(user=user)
+              .annotate(photo_sum=Sum('month_total__photo', filter=in_month),
+                        video_sum=Sum('month_total__video', filter=in_month),
+                        income_sum=Sum('month_total__income',
+                                       filter=in_month))
+              .order_by('pk'))
+    return [{'name': stock.name,
+             'pseudo_name': stock.pseudo_name,
+             'photo': stock.photo_sum or 0,
+             'video': stock.video_sum or 0,
+             'income': stock.income_sum or 0.0}
+            for stock in stocks]
+
+
+def year_total(user, year):
+    return (YearTotal.objects.filter(user=user, year=int(year)).first()
+            or YearTotal(user=user, year=int(year)))
+
+
+def month_diagram(user, year, month):
+    totals = month_totals(user=user, year=year, month=month)
+    return {'photoes': [total['photo'] for total in totals],
+            'videos': [total['video'] for total in totals],
+            'incomes': [total['income'] for total in totals],
+            'labels': [total['pseudo_name'] for total in totals]}
+
+
+def get_graphic(user, graphic, stock, year, month):
+    """График из кеша пользователя, см. cache.cached_result."""
+    if graphic == 'daily':
+        return cached_result(
+            user.pk,
+            ('daily', stock.pk, year, month),
+            lambda: month_graphic(year=year, month=month, stock=stock)
+        )
+    if graphic == 'monthly':
+        return cached_result(
+            user.pk,
+            ('monthly', stock.pk, year),
+            lambda: year_graphic(year=year, stock=stock)
+        )
+    return cached_result(
+        user.pk,
+        ('diagram', year, month),
+        lambda: month_diagram(user=user, year=year, month=month)
+    )
+
+
+def get_month_totals(user, year, month):
+    return cached_result(
+        user.pk,
+        ('total', year, month),
+        lambda: month_totals(user=user, year=year, month=month)
+    )
@@ -0,0 +1,164 @@
+import datetime as dt
+import hashlib
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import Sum
+from django.http import Http404, JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import (condition, require_GET,
+                                          require_http_methods)
+
+from .aggregates import get_graphic, get_month_totals
+from .cache import get_data_version
+from .forms import DayForm, SaleRowForm
+from .models import Day, MonthTotal, StockCount, set_month_uploads
+from .repository import get_repository
+from .views import check_date
+
+
+def series_etag(request, **kwargs):
+    """ETag ответа API по версии данных пользователя и параметрам."""
+    version = get_data_version(request.user.pk)
+    if version is None:
+        return None
+    raw = ':'.join([str(request.user.pk), str(version), request.path])
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def series_view(view):
+    view = condition(etag_func=series_etag)(view)
+    view = cache_control(private=True, max_age=0)(view)
+    return login_required(require_GET(view))
+
+
+def get_stock_or_404(request, name):
+    stock = get_repository(request).get_stock(name)
+    if stock is None:
+        raise Http404('Такого стока нет')
+    return stock
+
+
+def series_response(result):
+    return JsonResponse({'labels': result['labels'],
+                         'photo': result['photoes'],
+                         'video': result['videos'],
+                         'income': result['incomes']},
+                        json_dumps_params={'separators': (',', ':'),
+                                           'ensure_ascii': False})
+
+
+@series_view
+def daily_series(request, stock, year, month):
+    check_date(year=year, month=month, date=1)
+    stock = get_stock_or_404(request, stock)
+    return series_response(get_graphic(user=request.user,
+                                       graphic='daily',
+                                       stock=stock,
+                                       year=year,
+                                       month=month))
+
+
+@series_view
+def monthly_series(request, stock, year):
+    stock = get_stock_or_404(request, stock)
+    return series_response(get_graphic(user=request.user,
+                                       graphic='monthly',
+                                       stock=stock,
+                                       year=year,
+                                       month=None))
+
+
+@series_view
+def diagram_series(request, year, month):
+    check_date(year=year, month=month, date=1)
+    return series_response(get_graphic(user=request.user,
+                                       graphic='diagram',
+                                       stock=None,
+                                       year=year,
+                                       month=month))
+
+
+@series_view
+def total_series(request, year, month):
+    check_date(year=year, month=month, date=1)
+    totals = get_month_totals(user=request.user, year=year, month=month)
+    return series_response(
+        {'labels': [total['pseudo_name'] for total in totals],
+         'photoes': [total['photo'] for total in totals],
+         'videos': [total['video'] for total in totals],
+         'incomes': [total['income'] for total in totals]}
+    )
+
+
+@login_required
+@require_http_methods(['PATCH'])
+def day_cell(request, year, month, date):
+    """Меняет загрузки или продажи стока за один день.
+
+    Тело запроса - JSON с полями photo и video, для продаж еще stock и
+    income. Отсутствующие поля не меняются. В ответе новые значения
+    ячейки и итоги месяца.
+    """
+    check_date(year=year, month=month, date=date)
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'errors': 'Неверный JSON'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'errors': 'Ожидается объект'}, status=400)
+    if data.get('stock'):
+        return patch_sales(request, dt.date(year, month, date), data)
+    return patch_uploads(request, dt.date(year, month, date), data)
+
+
+def patch_uploads(request, date, data):
+    form = DayForm(data)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    day = get_repository(request).get_day(date.year, date.month, date.day)
+    saved = (day.photo, day.video) if day else (0, 0)
+    photo, video = [(saved_value or 0) if value is None else value
+                    for value, saved_value in zip(
+                        (form.cleaned_data['photo'],
+                         form.cleaned_data['video']),
+                        saved)]
+    day = set_month_uploads(user=request.user, year=date.year,
+                            month=date.month,
+                            uploads={date.day: (photo, video)})[date]
+    totals = (Day.objects.filter(month_id=day.month_id)
+              .aggregate(photo=Sum('photo'), video=Sum('video')))
+    return JsonResponse({'date': date.isoformat(),
+                         'photo': day.photo,
+                         'video': day.video,
+                         'month': {field: value or 0
+                                   for field, value in totals.items()}})
+
+
+def patch_sales(request, date, data):
+    stock = get_stock_or_404(request, data['stock'])
+    form = SaleRowForm(data)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    fields = ('photo', 'video', 'income')
+    with transaction.atomic():
+        saved = (StockCount.objects.select_for_update()
+                 .filter(stock=stock, date=date)
+                 .values_list(*fields).first()) or (0, 0, 0)
+        saved = [value or 0 for value in saved]
+        values = [saved_value if form.cleaned_data[field] is None
+                  else form.cleaned_data[field]
+                  for field, saved_value in zip(fields, saved)]
+        deltas = [value - saved_value
+                  for value, saved_value in zip(values, saved)]
+        if any(deltas):
+            StockCount.objects.add_many(request.user,
+                                        {(stock.pk, date): deltas})
+    total = (MonthTotal.objects
+             .filter(stock=stock, year=date.year, month=date.month)
+             .values(*fields).first())
+    return JsonResponse({'date': date.isoformat(),
+                         'stock': stock.name,
+                         **dict(zip(fields, values)),
+                         'month': total or dict.fromkeys(fields, 0)})
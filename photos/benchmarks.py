@@ -0,0 +1,90 @@
+import statistics
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from .metrics import QueryTimer
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def get_scenarios(user, year, month):
+    """Сценарии: имя и список запросов (метод, адрес, данные)."""
+    stock = user.stock.order_by('pk').first()
+    stock_name = stock.name if stock else ''
+    period = {'year': year, 'month': month}
+    scenarios = {
+        'index': [('get', reverse('index'), None)],
+        'month': [('get', reverse('months', args=(year, month)), None)],
+        'total': [('post', reverse('total'), period),
+                  ('get', reverse('api_total', args=(year, month)), None)],
+        'income': [('post', reverse('income'),
+                    {'date': f'{year}-{month:02}-01', 'stock': stock_name,
+                     'photo': 0, 'video': 0, 'income': 0})],
+    }
+    series = {
+        'daily': reverse('api_daily', args=(stock_name, year, month)),
+        'monthly': reverse('api_monthly', args=(stock_name, year)),
+        'diagram': reverse('api_diagram', args=(year, month)),
+    }
+    for graphic, url in series.items():
+        scenarios[f'graphic_{graphic}'] = [
+            ('post', reverse('graphic'),
+             {**period, 'graphic': graphic, 'stock': stock_name}),
+            ('get', url, None),
+        ]
+    return scenarios
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = round(percent / 100 * (len(values) - 1))
+    return values[index]
+
+
+def run_scenario(client, requests, repeat):
+    timings, queries, statuses = [], [], set()
+    for _ in range(repeat):
+        # запросы считаются на всех соединениях, а не только на default
+        timer = QueryTimer()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            start = time.perf_counter()
+            for method, url, data in requests:
+                response = getattr(client, method)(url, data)
+                statuses.add(response.status_code)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(timer.queries)
+    return {
+        'requests': len(requests),
+        'repeat': repeat,
+        'statuses': sorted(statuses),
+        'latency_ms': {
+            'mean': round(statistics.mean(timings), 3),
+            **{f'p{percent}': round(percentile(timings, percent), 3)
+               for percent in PERCENTILES},
+            'max': round(max(timings), 3),
+        },
+        'queries': {'min': min(queries), 'max': max(queries),
+                    'mean': round(statistics.mean(queries), 2)},
+    }
+
+
+def run_benchmarks(user, year, month, repeat=20, scenarios=None):
+    """Прогоняет сценарии через тестовый клиент и возвращает отчет.
+
+    Первый прогон каждого сценария не учитывается: он прогревает кеши.
+    """
+    client = Client(SERVER_NAME='localhost')
+    client.force_login(user)
+    report = {}
+    for name, requests in get_scenarios(user, year, month).items():
+        if scenarios and name not in scenarios:
+            continue
+        run_scenario(client, requests, repeat=1)
+        report[name] = run_scenario(client, requests, repeat)
+    return report
@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'photos:version:{user_id}'
+RESULT_KEY = 'photos:result:{user_id}:{version}:{parts}'
+
+
+def new_version():
+    return time.time_ns()
+
+
+def get_data_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(user_id):
+    """Делает недействительными все закешированные данные пользователя.
+
+    Версия увеличивается сразу и еще раз после коммита, чтобы чтение,
+    которое успело закешировать данные до коммита, не пережило его.
+    """
+    key = VERSION_KEY.format(user_id=user_id)
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, new_version(), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def cached_result(user_id, parts, build, timeout=None):
+    """Возвращает результат build из кеша текущей версии данных.
+
+    timeout по умолчанию - PHOTOS_RESULT_CACHE_TIMEOUT.
+    """
+    version = get_data_version(user_id)
+    if version is None:
+        return build()
+    key = RESULT_KEY.format(user_id=user_id,
+                            version=version,
+                            parts=':'.join(str(part) for part in parts))
+    result = cache.get(key)
+    if result is None:
+        result = build()
+        if timeout is None:
+            timeout = settings.PHOTOS_RESULT_CACHE_TIMEOUT
+        cache.set(key, result, timeout)
+    return result
@@ -0,0 +1,29 @@
+import os
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# Кеши, которые каждый процесс держит у себя
+LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Версия данных и графики должны лежать в общем для процессов кеше.
+
+    Иначе запись в одном воркере gunicorn или в команде (import_sales,
+    rebuild_totals) не сбрасывает кеш остальных, и графики вместе с
+    ETag остаются старыми до истечения PHOTOS_RESULT_CACHE_TIMEOUT.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in LOCAL_CACHES:
+        return []
+    hint = ('Задайте CACHE_BACKEND и CACHE_LOCATION общего кеша, '
+            'например Memcached, Redis или DatabaseCache')
+    if int(os.getenv('WEB_CONCURRENCY', 1)) > 1:
+        return [Error('Кеш в памяти процесса при нескольких воркерах '
+                      '(WEB_CONCURRENCY)', hint=hint, id='photos.E001')]
+    if not settings.DEBUG:
+        return [Warning('Кеш в памяти процесса не видит записей других '
+                        'процессов и команд', hint=hint, id='photos.W001')]
+    return []
@@ -0,0 +1,27 @@
+import hashlib
+
+from .repository import get_repository
+
+
+def get_period_stamp(request, year, month):
+    """Время последнего изменения данных месяца.
+
+    Месяц берется из репозитория запроса, поэтому страница месяца
+    не читает его второй раз.
+    """
+    return get_repository(request).get_month(year, month).modified
+
+
+def period_etag(request, year, month, **kwargs):
+    stamp = get_period_stamp(request, year, month)
+    # страница содержит CSRF-токен, поэтому ETag привязан к его секрету
+    raw = ':'.join((str(request.user.pk),
+                    str(year),
+                    str(month),
+                    stamp.isoformat() if stamp else '',
+                    request.META.get('CSRF_COOKIE', '')))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def period_last_modified(request, year, month, **kwargs):
+    return get_period_stamp(request, year, month)
@@ -0,0 +1,148 @@
+import csv
+import itertools
+import zipfile
+from xml.sax.saxutils import escape
+
+from .models import StockCount
+
+CHUNK_SIZE = 2000
+EXPORT_HEADER = ('Дата', 'Сток', 'Фото', 'Видео', 'Доход')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': ('application/'
+             'vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+# Минимальный набор частей книги Excel с одним листом
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+        'content-types">'
+        '<Default Extension="rels" ContentType="application/'
+        'vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType='
+        '"application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+        '2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/'
+        'spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.'
+        'org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Продажи" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+        '2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+        'officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/'
+    'spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def get_sales(user, date_from=None, date_to=None, stock=None):
+    """Продажи пользователя по датам, фильтры выполняются в базе."""
+    sales = StockCount.objects.filter(user=user)
+    if date_from:
+        sales = sales.filter(date__gte=date_from)
+    if date_to:
+        sales = sales.filter(date__lte=date_to)
+    if stock:
+        sales = sales.filter(stock__name=stock)
+    return (sales.order_by('date', 'stock__pseudo_name')
+            .values_list('date', 'stock__pseudo_name',
+                         'photo', 'video', 'income'))
+
+
+def export_rows(sales, chunk_size=CHUNK_SIZE):
+    """Строки выгрузки, читаемые из базы пачками по chunk_size."""
+    for date, stock, photo, video, income in sales.iterator(chunk_size):
+        yield date.isoformat(), stock, photo or 0, video or 0, income or 0
+
+
+class Echo:
+    """Файл, который не хранит записанное, а возвращает его."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(rows):
+    writer = csv.writer(Echo())
+    for row in itertools.chain([EXPORT_HEADER], rows):
+        yield writer.writerow(row)
+
+
+class ZipStream:
+    """Приемник для zipfile, из которого сжатые данные забираются
+    по мере записи."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def xlsx_chunks(rows):
+    """Книга Excel, собираемая на лету без хранения листа в памяти."""
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as book:
+        for name, content in XLSX_PARTS.items():
+            book.writestr(name, content)
+        with book.open('xl/worksheets/sheet1.xml', 'w',
+                       force_zip64=True) as sheet:
+            sheet.write(SHEET_HEAD.encode())
+            for row in itertools.chain([EXPORT_HEADER], rows):
+                sheet.write(xlsx_row(row).encode())
+                data = stream.pop()
+                if data:
+                    yield data
+            sheet.write(SHEET_TAIL.encode())
+    yield stream.pop()
+
+
+def xlsx_row(row):
+    cells = []
+    for value in row:
+        if isinstance(value, (int, float)):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            cells.append(f'<c t="inlineStr"><is><t>{escape(str(value))}'
+                         f'</t></is></c>')
+    return f'<row>{"".join(cells)}</row>'
+
+
+EXPORT_FORMATS = {'csv': csv_chunks, 'xlsx': xlsx_chunks}
@@ -4,7 +4,8 @@ from datetime import datetime as dt
 from django import forms
 
 from .models import Stock
-from .vars import graphics, months, stocks, years
+from .registry import stock_exists
+from .vars import export_formats, graphics, months, stocks, years
 
 # def get_stocks():
 #     stock_list = Stock.objects.filter(user=get_current_user())
@@ -24,6 +25,17 @@ class InputForm(forms.Form):
     video = forms.IntegerField(max_value=50, min_value=0, label='Видео')
 
 
+class DayForm(forms.Form):
+    """Ячейка сетки месяца; пустое поле означает «без изменений»."""
+    photo = forms.IntegerField(max_value=50, min_value=0, label='Фото',
+                               required=False)
+    video = forms.IntegerField(max_value=50, min_value=0, label='Видео',
+                               required=False)
+
+
+DayFormSet = forms.formset_factory(DayForm, extra=0)
+
+
 class GraphicForm(forms.Form):
     # stocks = get_stocks()
     # stocks = ((stock.name, stock.pseudo_name) for stock in stock_list)
@@ -56,6 +68,83 @@ class StockForm(forms.Form):
     stock = forms.ChoiceField(choices=stocks, label='Сток')
 
 
+class ImportForm(forms.Form):
+    file = forms.FileField(label='Отчет CSV')
+    stock = forms.ChoiceField(choices=stocks,
+                              label='Сток, если его нет в отчете',
+                              required=False)
+
+
+class ExportForm(forms.Form):
+    date_from = forms.DateField(label='С даты', required=False)
+    date_to = forms.DateField(label='По дату', required=False)
+    stock = forms.ChoiceField(choices=stocks, label='Сток', required=False)
+    format = forms.ChoiceField(choices=export_formats, label='Формат')
+
+
+class SaleDateForm(forms.Form):
+    date = forms.DateField(input_formats=['%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y'],
+                           label='Дата',
+                           localize=True)
+
+
+class SaleRowForm(forms.Form):
+    photo = forms.IntegerField(max_value=50,
+                               min_value=0,
+                               label='Фото',
+                               initial=0,
+                               required=False)
+    video = forms.IntegerField(max_value=50,
+                               min_value=0,
+                               label='Видео',
+                               initial=0,
+                               required=False)
+    income = forms.FloatField(max_value=9999,
+                              label='Доход',
+                              initial=0,
+                              required=False)
+
+
+class StockSaleRowForm(SaleRowForm):
+    """Строка формы продаж по всем стокам.
+
+    Строка несет id своего стока: список стоков мог измениться между
+    открытием формы и отправкой, поэтому позиция строки ничего не значит.
+    """
+    stock = forms.IntegerField(widget=forms.HiddenInput)
+
+    def __init__(self, *args, stocks=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # стоки пользователя по id
+        self.stocks = stocks or {}
+
+    @property
+    def selected_stock(self):
+        try:
+            return self.stocks.get(int(self['stock'].value()))
+        except (TypeError, ValueError):
+            return None
+
+    def clean_stock(self):
+        stock = self.stocks.get(self.cleaned_data['stock'])
+        if stock is None:
+            raise forms.ValidationError('Сток не найден, обновите страницу')
+        return stock
+
+
+class BaseSaleRowFormSet(forms.BaseFormSet):
+    def clean(self):
+        if any(self.errors):
+            return
+        stocks = [form.cleaned_data['stock'] for form in self.forms]
+        if len(set(stocks)) != len(stocks):
+            raise forms.ValidationError('Сток указан дважды')
+
+
+SaleRowFormSet = forms.formset_factory(StockSaleRowForm, BaseSaleRowFormSet,
+                                       extra=0)
+
+
 class StockCreateForm(forms.ModelForm):
     class Meta:
         model = Stock
@@ -70,13 +159,9 @@ class StockCreateForm(forms.ModelForm):
         msg_pseudo_exists = 'Псевдоним уже существует'
         if not name:
             self.add_error('name', msg_empty)
-        else:
-            name_exists = Stock.objects.filter(name=name)
-            if name_exists:
-                self.add_error('name', msg_name_exists)
+        elif stock_exists(self.instance.user_id, name=name):
+            self.add_error('name', msg_name_exists)
         if not pseudo_name:
             self.add_error('pseudo_name', msg_empty)
-        else:
-            pseudo_exists = Stock.objects.filter(pseudo_name=pseudo_name)
-            if pseudo_exists:
-                self.add_error('pseudo_name', msg_pseudo_exists)
+        elif stock_exists(self.instance.user_id, pseudo_name=pseudo_name):
+            self.add_error('pseudo_name', msg_pseudo_exists)
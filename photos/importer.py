@@ -0,0 +1,232 @@
+import csv
+import datetime as dt
+import hashlib
+import itertools
+import re
+import uuid
+
+from django.db import transaction
+
+from .models import ImportedSale, ImportOccurrence, StockCount
+from .registry import get_stocks
+
+CHUNK_SIZE = 1000
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%d.%m.%Y')
+# Названия колонок в отчетах разных стоков, в нижнем регистре
+COLUMNS = {
+    'date': ('date', 'sale date', 'download date', 'дата'),
+    'stock': ('stock', 'agency', 'site', 'сток'),
+    'photo': ('photo', 'photos', 'фото'),
+    'video': ('video', 'videos', 'видео'),
+    'income': ('income', 'earnings', 'royalty', 'amount', 'доход'),
+    'media': ('media type', 'asset type', 'content type', 'type'),
+}
+VIDEO_MEDIA = ('video', 'footage', 'clip')
+# Целая часть без разделителей или с разделителями тысяч и необязательная
+# дробная часть: '2,50', '1,234.56', '1.234,56', '1 234'
+NUMBER = re.compile(r'(?P<integer>\d+|\d{1,3}(?:(?P<thousands>[.,])\d{3})+)'
+                    r'(?:(?P<point>[.,])(?P<fraction>\d+))?')
+
+
+class SalesImportError(ValueError):
+    pass
+
+
+class ImportStats:
+    """Счетчики импорта, обновляются после каждой пачки."""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    def __str__(self):
+        return (f'строк: {self.rows}, загружено: {self.imported}, '
+                f'повторов: {self.duplicates}, '
+                f'отклонено: {self.rejected}')
+
+
+def import_sales(user, stream, stock=None, chunk_size=CHUNK_SIZE,
+                 progress=None):
+    """Загружает продажи из CSV-отчета стока.
+
+    Файл читается построчно и записывается пачками по chunk_size строк,
+    каждая пачка - в своей транзакции. Счетчики повторов строк хранятся
+    в базе (ImportOccurrence), поэтому память не растет с размером
+    отчета. Если в отчете нет колонки стока, все строки
+    относятся к стоку stock. Уже загруженные строки пропускаются.
+    После каждой пачки вызывается progress(stats).
+    """
+    reader = open_reader(stream)
+    columns = get_columns(next(reader, None))
+    if 'stock' not in columns and not stock:
+        raise SalesImportError('В отчете нет колонки стока, укажите сток')
+    stocks = get_stock_ids(user)
+    stats = ImportStats()
+    run = uuid.uuid4().hex
+    rows = (parse_row(row, columns, stock) for row in reader if any(row))
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return stats
+            import_chunk(user, run, chunk, stocks, stats)
+            if progress is not None:
+                progress(stats)
+    finally:
+        ImportOccurrence.objects.filter(run=run).delete()
+
+
+def open_reader(stream):
+    header = stream.readline()
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    return csv.reader(itertools.chain([header], stream), dialect)
+
+
+def get_columns(header):
+    if header is None:
+        raise SalesImportError('Файл пуст')
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    if 'date' not in columns:
+        raise SalesImportError('В отчете нет колонки с датой')
+    return columns
+
+
+def get_stock_ids(user):
+    stocks = {}
+    for stock in get_stocks(user.pk):
+        stocks.setdefault(stock.pseudo_name.lower(), stock.pk)
+        stocks[stock.name.lower()] = stock.pk
+    return stocks
+
+
+def parse_row(row, columns, stock):
+    """Возвращает (содержимое, сток, дата, фото, видео, доход) или None."""
+    def value(field):
+        index = columns.get(field)
+        if index is None or index >= len(row):
+            return ''
+        return row[index].strip()
+
+    try:
+        date = parse_date(value('date'))
+        income = parse_number(value('income'))
+        if 'photo' in columns or 'video' in columns:
+            photo = int(parse_number(value('photo')))
+            video = int(parse_number(value('video')))
+        else:
+            is_video = value('media').lower().startswith(VIDEO_MEDIA)
+            photo, video = int(not is_video), int(is_video)
+    except ValueError:
+        return None
+    stock_name = value('stock') or stock or ''
+    if not stock_name:
+        return None
+    content = '|'.join([stock_name.lower(), date.isoformat(),
+                        str(photo), str(video), repr(income)])
+    return content, stock_name.lower(), date, photo, video, income
+
+
+def parse_date(value):
+    value = value.split()[0].split('T')[0] if value else value
+    for date_format in DATE_FORMATS:
+        try:
+            return dt.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Неизвестный формат даты: {value}')
+
+
+def parse_number(value):
+    """Число из отчета стока.
+
+    Если в числе есть и точка, и запятая, дробную часть отделяет
+    последний знак, а первый разделяет тысячи. Одна запятая - дробная.
+    Неоднозначные значения вроде '1,234,56' отклоняются.
+    """
+    value = value.replace('$', '').replace(' ', '').replace('\xa0', '')
+    if not value:
+        return 0.0
+    sign = '-' if value.startswith('-') else ''
+    match = NUMBER.fullmatch(value.lstrip('-'))
+    thousands = match and match['thousands']
+    if match is None or thousands and match['point'] == thousands:
+        raise ValueError(f'Неизвестный формат числа: {value}')
+    integer = match['integer']
+    if thousands:
+        integer = integer.replace(thousands, '')
+    return float(f'{sign}{integer}.{match["fraction"] or 0}')
+
+
+def get_digests(run, rows):
+    """Отпечатки строк пачки по порядку.
+
+    Отпечаток строится по содержимому строки и номеру ее повтора в
+    файле, а не по номеру строки: в более длинном или переупорядоченном
+    отчете за тот же период уже загруженные продажи узнаются и
+    пропускаются. Номера повторов продолжаются между пачками через
+    ImportOccurrence.
+    """
+    keys = {row[0]: hashlib.sha1(row[0].encode()).hexdigest()
+            for row in rows}
+    occurrences = {occurrence.content: occurrence for occurrence
+                   in ImportOccurrence.objects.filter(
+                       run=run, content__in=keys.values()
+                   )}
+    existing = list(occurrences.values())
+    created = [ImportOccurrence(run=run, content=key)
+               for key in set(keys.values()) - occurrences.keys()]
+    occurrences.update((occurrence.content, occurrence)
+                       for occurrence in created)
+    digests = []
+    for row in rows:
+        occurrence = occurrences[keys[row[0]]]
+        occurrence.seen += 1
+        raw = f'{row[0]}|{occurrence.seen}'
+        digests.append(hashlib.sha1(raw.encode()).hexdigest())
+    ImportOccurrence.objects.bulk_create(created)
+    ImportOccurrence.objects.bulk_update(existing, ['seen'])
+    return digests
+
+
+def import_chunk(user, run, chunk, stocks, stats):
+    stats.rows += len(chunk)
+    rows = []
+    for row in chunk:
+        if row is None or row[1] not in stocks:
+            stats.rejected += 1
+        else:
+            rows.append(row)
+    with transaction.atomic():
+        rows = dict(zip(get_digests(run, rows), rows))
+        # одновременная загрузка того же отчета могла записать часть
+        # отпечатков раньше: новыми считаются только вставленные здесь
+        ImportedSale.objects.bulk_create(
+            [ImportedSale(user=user, digest=digest, run=run)
+             for digest in rows],
+            ignore_conflicts=True,
+        )
+        inserted = set(ImportedSale.objects
+                       .filter(user=user, run=run, digest__in=rows)
+                       .values_list('digest', flat=True))
+        new_rows = [row for digest, row in rows.items()
+                    if digest in inserted]
+        stats.duplicates += len(rows) - len(new_rows)
+        sales = {}
+        for _, stock_name, date, photo, video, income in new_rows:
+            total = sales.setdefault((stocks[stock_name], date), [0, 0, 0])
+            total[0] += photo
+            total[1] += video
+            total[2] += income
+        StockCount.objects.add_many(user, sales)
+    stats.imported += len(new_rows)
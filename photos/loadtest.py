@@ -0,0 +1,265 @@
+"""Нагрузочный прогон против запущенного сервера.
+
+Синтетические пользователи (их создает seed_data) входят на сайт и
+одновременно смотрят месяц, вносят продажи и запрашивают данные
+графиков. После прогона суммы StockCount сверяются с подтвержденными
+записями, чтобы найти потерянные и задвоенные обновления.
+"""
+import random
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urlsplit
+from urllib.request import (HTTPCookieProcessor, HTTPRedirectHandler,
+                            build_opener)
+
+from django.db.models import Count, Sum
+from django.urls import reverse
+
+from .benchmarks import PERCENTILES, percentile
+from .models import Stock, StockCount, User
+from .seeding import PASSWORD, USERNAME
+
+ACTIONS = ('month', 'income', 'graphic')
+DEFAULT_MIX = {'month': 6, 'income': 2, 'graphic': 2}
+GRAPHICS = ('api_daily', 'api_monthly', 'api_diagram')
+# Ожидаемый статус ответа и, для перенаправления, имя адреса, куда оно
+# ведет; любой другой ответ считается ошибкой
+EXPECTED = {'month': (200, None), 'income': (302, 'index'),
+            'graphic': (200, None)}
+
+
+class NoRedirect(HTTPRedirectHandler):
+    """Перенаправление после записи - признак успеха, а не повод для
+    еще одного запроса."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class LoadUser:
+    """Сессия одного синтетического пользователя."""
+
+    def __init__(self, base_url, user, stocks, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.user = user
+        self.stocks = stocks
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies),
+                                   NoRedirect)
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, path, data=None):
+        """Возвращает статус ответа и адрес перенаправления;
+        статус 0 - сервер недоступен."""
+        if data is not None:
+            data = urlencode({**data, 'csrfmiddlewaretoken':
+                              self.csrf_token()}).encode()
+        try:
+            with self.opener.open(self.base_url + path, data,
+                                  timeout=self.timeout) as response:
+                response.read()
+                return response.status, None
+        except HTTPError as error:
+            return error.code, error.headers.get('Location')
+        except (URLError, OSError):
+            return 0, None
+
+    def login(self, password):
+        path = reverse('login')
+        self.request(path)
+        status, _ = self.request(path, {'username': self.user.username,
+                                        'password': password})
+        return status == 302
+
+
+def is_expected(action, status, location):
+    """Ответ успешен, только если и статус, и перенаправление те, что
+    дает представление: после истекшей сессии запись тоже отвечает 302,
+    но на страницу входа."""
+    expected_status, target = EXPECTED[action]
+    if status != expected_status:
+        return False
+    return target is None or urlsplit(location or '').path == reverse(target)
+
+
+def parse_mix(value):
+    """'month=6,income=2,graphic=2' -> {'month': 6, ...}"""
+    mix = {}
+    for part in value.split(','):
+        action, _, weight = part.partition('=')
+        action = action.strip()
+        if action not in ACTIONS:
+            raise ValueError(f'Неизвестное действие: {action}')
+        mix[action] = float(weight)
+    if not any(mix.values()):
+        raise ValueError('Все доли равны нулю')
+    return mix
+
+
+def make_plan(users, requests, mix, year, month, rng):
+    """Список (пользователь, действие, путь, данные) в случайном порядке."""
+    actions = list(mix)
+    weights = [mix[action] for action in actions]
+    plan = []
+    for _ in range(requests):
+        load_user = rng.choice(users)
+        action = rng.choices(actions, weights)[0]
+        stock = rng.choice(load_user.stocks)
+        if action == 'month':
+            plan.append((load_user, action,
+                         reverse('months', args=(year, month)), None))
+        elif action == 'income':
+            date = f'{year}-{month:02}-{rng.randint(1, 28):02}'
+            plan.append((load_user, action, reverse('income'),
+                         {'date': date, 'stock': stock,
+                          'photo': 1, 'video': 0, 'income': 1}))
+        else:
+            name = rng.choice(GRAPHICS)
+            args = {'api_daily': (stock, year, month),
+                    'api_monthly': (stock, year),
+                    'api_diagram': (year, month)}[name]
+            plan.append((load_user, action, reverse(name, args=args), None))
+    return plan
+
+
+def get_sums(users, year, month):
+    """Суммы фото по (пользователь, сток, дата) за месяц прогона."""
+    counts = (StockCount.objects
+              .filter(user__in=users, date__year=year, date__month=month)
+              .values_list('user__username', 'stock__name', 'date')
+              .annotate(photo=Sum('photo')))
+    return {(username, stock, str(date)): photo or 0
+            for username, stock, date, photo in counts}
+
+
+def get_duplicates(users, year, month):
+    """Строки StockCount, повторяющие одну пару сток-день."""
+    return (StockCount.objects
+            .filter(user__in=users, date__year=year, date__month=month)
+            .values('stock', 'day')
+            .annotate(rows=Count('pk'))
+            .filter(rows__gt=1)
+            .count())
+
+
+def check_writes(before, after, confirmed, failed):
+    """Сравнивает прирост сумм с подтвержденными записями.
+
+    Запись, ответ на которую не пришел, могла как примениться, так и
+    нет, поэтому она учитывается только как допуск сверху.
+    """
+    lost = duplicated = 0
+    for key in confirmed.keys() | failed.keys() | after.keys():
+        delta = after.get(key, 0) - before.get(key, 0)
+        lost += max(confirmed[key] - delta, 0)
+        duplicated += max(delta - confirmed[key] - failed[key], 0)
+    return {'writes_confirmed': sum(confirmed.values()),
+            'writes_failed': sum(failed.values()),
+            'lost': lost,
+            'duplicated': duplicated}
+
+
+def latency_stats(timings):
+    if not timings:
+        return {}
+    return {
+        'mean': round(statistics.mean(timings), 3),
+        **{f'p{percent}': round(percentile(timings, percent), 3)
+           for percent in PERCENTILES},
+        'max': round(max(timings), 3),
+    }
+
+
+def run_load(base_url, users=10, requests=1000, workers=10, mix=None,
+             year=2022, month=7, seed_value=0, password=PASSWORD,
+             timeout=10):
+    """Прогоняет requests запросов в workers потоков и возвращает отчет.
+
+    Пользователи - первые users из созданных seed_data. Продажи вносятся
+    по одному фото на сток и день месяца year-month; данные графиков
+    запрашиваются из API, как это делает страница графика.
+    """
+    prefix = USERNAME.format(number='')
+    accounts = list(User.objects.filter(username__startswith=prefix)
+                    .order_by('pk')[:users])
+    names = defaultdict(list)
+    for user_id, name in (Stock.objects.filter(user__in=accounts)
+                          .order_by('pk').values_list('user_id', 'name')):
+        names[user_id].append(name)
+    load_users = [LoadUser(base_url, user, names[user.pk], timeout)
+                  for user in accounts if names[user.pk]]
+    if not load_users:
+        raise ValueError('Нет пользователей со стоками, '
+                         'сначала запустите seed_data')
+    for load_user in load_users:
+        if not load_user.login(password):
+            raise ValueError(f'Не удалось войти как '
+                             f'{load_user.user.username}')
+    rng = random.Random(seed_value)
+    plan = make_plan(load_users, requests, mix or DEFAULT_MIX, year, month,
+                     rng)
+    before = get_sums(accounts, year, month)
+
+    lock = threading.Lock()
+    timings = defaultdict(list)
+    statuses = defaultdict(Counter)
+    failures = Counter()
+    confirmed, failed = Counter(), Counter()
+
+    def send(task):
+        load_user, action, path, data = task
+        start = time.perf_counter()
+        status, location = load_user.request(path, data)
+        elapsed = (time.perf_counter() - start) * 1000
+        success = is_expected(action, status, location)
+        with lock:
+            timings[action].append(elapsed)
+            statuses[action][status] += 1
+            failures[action] += not success
+            if action == 'income':
+                key = (load_user.user.username, data['stock'], data['date'])
+                if success:
+                    confirmed[key] += data['photo']
+                else:
+                    failed[key] += data['photo']
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(send, plan))
+    duration = time.perf_counter() - start
+
+    errors = sum(failures.values())
+    all_timings = [value for values in timings.values() for value in values]
+    consistency = check_writes(before, get_sums(accounts, year, month),
+                               confirmed, failed)
+    consistency['duplicate_rows'] = get_duplicates(accounts, year, month)
+    return {
+        'users': len(load_users),
+        'workers': workers,
+        'requests': len(plan),
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(plan) / duration, 2) if duration else 0,
+        'errors': errors,
+        'error_rate': round(errors / len(plan), 4) if plan else 0,
+        'latency_ms': latency_stats(all_timings),
+        'actions': {
+            action: {'requests': len(timings[action]),
+                     'statuses': {str(status): count for status, count
+                                  in sorted(statuses[action].items())},
+                     'errors': failures[action],
+                     'latency_ms': latency_stats(timings[action])}
+            for action in sorted(timings)
+        },
+        'consistency': consistency,
+    }
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from photos.benchmarks import get_scenarios, run_benchmarks
+from photos.models import User
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время ответа и число запросов основных страниц '
+            'и выводит отчет в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='seed_user_0',
+                            dest='username')
+        parser.add_argument('--year', type=int, default=2022)
+        parser.add_argument('--month', type=int, default=7)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help='Только эти сценарии')
+        parser.add_argument('--output', '-o', help='Файл для отчета')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден, '
+                               'сначала запустите seed_data')
+        known = get_scenarios(user, options['year'], options['month'])
+        unknown = set(options['scenarios'] or ()) - known.keys()
+        if unknown:
+            raise CommandError(f'Неизвестные сценарии: {sorted(unknown)}')
+        report = run_benchmarks(user, options['year'], options['month'],
+                                repeat=options['repeat'],
+                                scenarios=options['scenarios'])
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output)
+        else:
+            self.stdout.write(output)
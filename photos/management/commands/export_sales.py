@@ -0,0 +1,50 @@
+import datetime as dt
+
+from django.core.management.base import BaseCommand, CommandError
+
+from photos.export import CHUNK_SIZE, EXPORT_FORMATS, export_rows, get_sales
+from photos.models import User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает историю продаж пользователя в CSV или Excel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, dest='username',
+                            help='Владелец продаж')
+        parser.add_argument('--output', '-o',
+                            help='Файл выгрузки, по умолчанию stdout')
+        parser.add_argument('--format', choices=EXPORT_FORMATS,
+                            default='csv')
+        parser.add_argument('--from', dest='date_from',
+                            type=dt.date.fromisoformat,
+                            help='Начальная дата, ГГГГ-ММ-ДД')
+        parser.add_argument('--to', dest='date_to',
+                            type=dt.date.fromisoformat,
+                            help='Конечная дата, ГГГГ-ММ-ДД')
+        parser.add_argument('--stock', help='Только этот сток')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Строк, читаемых из базы за раз')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден')
+        if options['format'] == 'xlsx' and not options['output']:
+            raise CommandError('Для Excel укажите --output')
+        sales = get_sales(user=user,
+                          date_from=options['date_from'],
+                          date_to=options['date_to'],
+                          stock=options['stock'])
+        chunks = EXPORT_FORMATS[options['format']](
+            export_rows(sales, chunk_size=options['chunk_size'])
+        )
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        mode = 'wb' if options['format'] == 'xlsx' else 'w'
+        with open(options['output'], mode) as export_file:
+            for chunk in chunks:
+                export_file.write(chunk)
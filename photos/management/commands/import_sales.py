@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from photos.importer import CHUNK_SIZE, SalesImportError, import_sales
+from photos.models import User
+
+
+class Command(BaseCommand):
+    help = 'Загружает продажи из CSV-отчета стока'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к CSV-файлу')
+        parser.add_argument('--user', required=True, dest='username',
+                            help='Владелец продаж')
+        parser.add_argument('--stock',
+                            help='Сток для отчетов без колонки стока')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Строк в одной транзакции')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден')
+        with open(options['path'], newline='', encoding='utf-8-sig') as f:
+            try:
+                stats = import_sales(user, f,
+                                     stock=options['stock'],
+                                     chunk_size=options['chunk_size'],
+                                     progress=self.report)
+            except SalesImportError as error:
+                raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(f'Импорт завершен: {stats}'))
+
+    def report(self, stats):
+        self.stdout.write(f'... {stats}')
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from photos.loadtest import DEFAULT_MIX, parse_mix, run_load
+
+
+class Command(BaseCommand):
+    help = ('Нагружает запущенный сервер синтетическими пользователями '
+            'и проверяет, что ни одна продажа не потерялась')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8888',
+                            help='Адрес сервера, например gunicorn из '
+                                 'Dockerfile')
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=10,
+                            help='Одновременных запросов')
+        parser.add_argument('--mix', type=parse_mix,
+                            default=DEFAULT_MIX,
+                            help='Доли действий, например '
+                                 'month=6,income=2,graphic=2')
+        parser.add_argument('--year', type=int, default=2022)
+        parser.add_argument('--month', type=int, default=7)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--timeout', type=float, default=10)
+        parser.add_argument('--output', '-o', help='Файл для отчета')
+
+    def handle(self, *args, **options):
+        try:
+            report = run_load(options['url'],
+                              users=options['users'],
+                              requests=options['requests'],
+                              workers=options['workers'],
+                              mix=options['mix'],
+                              year=options['year'],
+                              month=options['month'],
+                              seed_value=options['seed'],
+                              timeout=options['timeout'])
+        except ValueError as error:
+            raise CommandError(error)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output)
+        else:
+            self.stdout.write(output)
+        consistency = report['consistency']
+        if (consistency['lost'] or consistency['duplicated']
+                or consistency['duplicate_rows']):
+            raise CommandError('Обнаружены потерянные или задвоенные '
+                               'обновления StockCount')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from photos.models import User
+from photos.rollups import rebuild_totals
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает помесячные и годовые итоги продаж с нуля'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames',
+                            help='Пересчитать только этих пользователей')
+
+    def handle(self, *args, **options):
+        users = None
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        rebuild_totals(users=users)
+        self.stdout.write(self.style.SUCCESS('Итоги пересчитаны'))
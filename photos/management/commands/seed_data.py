@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from photos.seeding import PASSWORD, seed
+
+
+class Command(BaseCommand):
+    help = ('Создает воспроизводимые тестовые данные: '
+            'пользователи x стоки x годы')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--stocks', type=int, default=3)
+        parser.add_argument('--years', type=int, default=1)
+        parser.add_argument('--start-year', type=int, default=2022)
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Зерно генератора случайных чисел')
+        parser.add_argument('--sale-chance', type=float, default=0.5,
+                            help='Вероятность продажи стока за день')
+
+    def handle(self, *args, **options):
+        users = seed(users=options['users'],
+                     stocks=options['stocks'],
+                     years=options['years'],
+                     start_year=options['start_year'],
+                     seed_value=options['seed'],
+                     sale_chance=options['sale_chance'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(users)} '
+            f'({users[0].username}..., пароль {PASSWORD})'
+            if users else 'Пользователи не созданы'
+        ))
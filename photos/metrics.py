@@ -0,0 +1,176 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from counter.db.pool import get_pools
+
+# Границы корзин гистограммы времени ответа, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+POOL_COUNTERS = (
+    ('checkouts', 'Выдано соединений из пула'),
+    ('waits', 'Выдачи, ждавшие свободное соединение'),
+    ('wait_seconds', 'Время ожидания соединения, секунды'),
+    ('timeouts', 'Соединение не дождались'),
+    ('created', 'Открыто соединений'),
+    ('discarded', 'Закрыто неисправных соединений'),
+)
+
+
+class ViewStats:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statuses = {}
+
+
+class Metrics:
+    """Метрики представлений, накапливаемые в памяти процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.views = {}
+
+    def observe(self, view, status, seconds, queries, db_seconds):
+        with self.lock:
+            stats = self.views.get(view)
+            if stats is None:
+                stats = self.views[view] = ViewStats()
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[index] += 1
+                    break
+            stats.count += 1
+            stats.seconds += seconds
+            stats.queries += queries
+            stats.db_seconds += db_seconds
+            status = f'{status // 100}xx'
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        with self.lock:
+            views = sorted(self.views.items())
+        lines = [
+            '# HELP photos_view_latency_seconds Время ответа представления',
+            '# TYPE photos_view_latency_seconds histogram',
+        ]
+        for view, stats in views:
+            total = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                total += count
+                lines.append(f'photos_view_latency_seconds_bucket'
+                             f'{{view="{view}",le="{bound}"}} {total}')
+            lines += [
+                f'photos_view_latency_seconds_bucket'
+                f'{{view="{view}",le="+Inf"}} {stats.count}',
+                f'photos_view_latency_seconds_sum{{view="{view}"}} '
+                f'{stats.seconds:.6f}',
+                f'photos_view_latency_seconds_count{{view="{view}"}} '
+                f'{stats.count}',
+            ]
+        lines += [
+            '# HELP photos_view_requests_total Ответы по классам статусов',
+            '# TYPE photos_view_requests_total counter',
+        ]
+        for view, stats in views:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'photos_view_requests_total'
+                             f'{{view="{view}",status="{status}"}} {count}')
+        lines += [
+            '# HELP photos_view_db_queries_total Запросы к базе',
+            '# TYPE photos_view_db_queries_total counter',
+        ]
+        lines += [f'photos_view_db_queries_total{{view="{view}"}} '
+                  f'{stats.queries}' for view, stats in views]
+        lines += [
+            '# HELP photos_view_db_seconds_total Время запросов к базе',
+            '# TYPE photos_view_db_seconds_total counter',
+        ]
+        lines += [f'photos_view_db_seconds_total{{view="{view}"}} '
+                  f'{stats.db_seconds:.6f}' for view, stats in views]
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def render_pools():
+    """Состояние пулов соединений процесса, см. counter.db.pool."""
+    states = []
+    for alias, pool in sorted(get_pools().items()):
+        with pool.condition:
+            states.append((alias, len(pool.idle), pool.in_use,
+                           vars(pool.stats).copy()))
+    if not states:
+        return ''
+    lines = [
+        '# HELP photos_db_pool_connections Соединения пула',
+        '# TYPE photos_db_pool_connections gauge',
+    ]
+    for alias, idle, in_use, _ in states:
+        lines += [
+            f'photos_db_pool_connections{{alias="{alias}",state="idle"}} '
+            f'{idle}',
+            f'photos_db_pool_connections{{alias="{alias}",state="in_use"}} '
+            f'{in_use}',
+        ]
+    for name, help_text in POOL_COUNTERS:
+        lines += [f'# HELP photos_db_pool_{name}_total {help_text}',
+                  f'# TYPE photos_db_pool_{name}_total counter']
+        lines += [f'photos_db_pool_{name}_total{{alias="{alias}"}} '
+                  f'{stats[name]}' for alias, _, _, stats in states]
+    return '\n'.join(lines) + '\n'
+
+
+class QueryTimer:
+    """execute_wrapper, считающий запросы и их время.
+
+    Один таймер висит на всех соединениях, которыми могут
+    пользоваться разные потоки, поэтому счетчики под блокировкой.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self.lock:
+                self.queries += 1
+                self.seconds += time.perf_counter() - start
+
+
+def has_metrics_access(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if constant_time_compare(header, f'Bearer {token}'):
+            return True
+    return request.user.is_active and request.user.is_staff
+
+
+def metrics_view(request):
+    """Метрики для Prometheus, доступны персоналу или по токену."""
+    if has_metrics_access(request):
+        return HttpResponse(metrics.render() + render_pools(),
+                            content_type=CONTENT_TYPE)
+    if request.user.is_authenticated:
+        raise PermissionDenied
+    return redirect_to_login(request.get_full_path())
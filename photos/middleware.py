@@ -0,0 +1,52 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import QueryTimer, metrics
+from .slow_queries import SlowQueryRecorder
+
+
+class MetricsMiddleware:
+    """Собирает время ответа, число и время запросов к базе
+    для каждого представления."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        match = request.resolver_match
+        metrics.observe(view=match.view_name if match else 'unresolved',
+                        status=response.status_code,
+                        seconds=time.perf_counter() - start,
+                        queries=timer.queries,
+                        db_seconds=timer.seconds)
+        return response
+
+
+class SlowQueryMiddleware:
+    """Сохраняет медленные запросы представления вместе с планами."""
+
+    def __init__(self, get_response):
+        if settings.PHOTOS_SLOW_QUERY_THRESHOLD_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = SlowQueryRecorder(settings.PHOTOS_SLOW_QUERY_THRESHOLD_MS)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        match = request.resolver_match
+        recorder.save(view=match.view_name if match else 'unresolved',
+                      path=request.path)
+        return response
@@ -0,0 +1,69 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:02
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def merge_duplicate_rows(apps, schema_editor):
+    Month = apps.get_model('photos', 'Month')
+    Day = apps.get_model('photos', 'Day')
+    StockCount = apps.get_model('photos', 'StockCount')
+
+    # Пустые ячейки календаря (date=0) больше не хранятся
+    Day.objects.filter(date__isnull=True).delete()
+    Day.objects.filter(date__lte=0).delete()
+
+    duplicates = (Month.objects
+                  .values('user', 'month_list', 'year_list')
+                  .annotate(keep=Max('pk'), rows=Count('pk'))
+                  .filter(rows__gt=1)
+                  .order_by())
+    for group in duplicates:
+        others = (Month.objects
+                  .filter(user=group['user'],
+                          month_list=group['month_list'],
+                          year_list=group['year_list'])
+                  .exclude(pk=group['keep']))
+        Day.objects.filter(month__in=others).update(month_id=group['keep'])
+        others.delete()
+
+    duplicates = (Day.objects
+                  .values('month', 'date')
+                  .annotate(keep=Max('pk'), rows=Count('pk'))
+                  .filter(rows__gt=1)
+                  .order_by())
+    for group in duplicates:
+        others = (Day.objects
+                  .filter(month=group['month'], date=group['date'])
+                  .exclude(pk=group['keep']))
+        StockCount.objects.filter(day__in=others).update(day_id=group['keep'])
+        others.delete()
+
+    duplicates = (StockCount.objects
+                  .values('stock', 'day')
+                  .annotate(keep=Max('pk'), rows=Count('pk'))
+                  .filter(rows__gt=1)
+                  .order_by())
+    for group in duplicates:
+        counts = StockCount.objects.filter(stock=group['stock'],
+                                           day=group['day'])
+        keeper = counts.get(pk=group['keep'])
+        others = counts.exclude(pk=group['keep'])
+        for count in others:
+            keeper.photo = (keeper.photo or 0) + (count.photo or 0)
+            keeper.video = (keeper.video or 0) + (count.video or 0)
+            keeper.income = (keeper.income or 0) + (count.income or 0)
+        keeper.save()
+        others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rows,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0002_merge_duplicate_rows'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='day',
+            constraint=models.UniqueConstraint(fields=('month', 'date'), name='uniq_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='month',
+            constraint=models.UniqueConstraint(fields=('user', 'month_list', 'year_list'), name='uniq_month'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockcount',
+            constraint=models.UniqueConstraint(fields=('stock', 'day'), name='uniq_stock_day'),
+        ),
+    ]
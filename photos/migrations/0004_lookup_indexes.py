@@ -0,0 +1,25 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0003_unique_month_day_stockcount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='day',
+            index=models.Index(fields=['month', 'date', 'photo', 'video'], name='day_month_cover_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='month',
+            index=models.Index(fields=['user', 'year_list', 'month_list'], name='month_user_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcount',
+            index=models.Index(fields=['stock', 'day', 'photo', 'video', 'income'], name='count_stock_day_cover_idx'),
+        ),
+    ]
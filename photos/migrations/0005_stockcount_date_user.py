@@ -0,0 +1,26 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('photos', '0004_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockcount',
+            name='date',
+            field=models.DateField(null=True, verbose_name='Дата продажи'),
+        ),
+        migrations.AddField(
+            model_name='stockcount',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_count', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:20
+
+import datetime as dt
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def fill_date_user(apps, schema_editor):
+    Day = apps.get_model('photos', 'Day')
+    Stock = apps.get_model('photos', 'Stock')
+    StockCount = apps.get_model('photos', 'StockCount')
+
+    StockCount.objects.update(user_id=Subquery(
+        Stock.objects.filter(pk=OuterRef('stock_id')).values('user_id')[:1]
+    ))
+    days = (Day.objects
+            .filter(stock_count_day__isnull=False)
+            .values_list('pk', 'date', 'month__month_list',
+                         'month__year_list')
+            .distinct()
+            .order_by())
+    for pk, date, month, year in days.iterator():
+        StockCount.objects.filter(day_id=pk).update(
+            date=dt.date(year, month, date)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0005_stockcount_date_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_date_user, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('photos', '0006_fill_stockcount_date_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockcount',
+            name='date',
+            field=models.DateField(verbose_name='Дата продажи'),
+        ),
+        migrations.AlterField(
+            model_name='stockcount',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_count', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.RemoveIndex(
+            model_name='stockcount',
+            name='count_stock_day_cover_idx',
+        ),
+        migrations.AddIndex(
+            model_name='stockcount',
+            index=models.Index(fields=['stock', 'date', 'photo', 'video', 'income'], name='count_stock_date_cover_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcount',
+            index=models.Index(fields=['user', 'date'], name='count_user_date_idx'),
+        ),
+    ]
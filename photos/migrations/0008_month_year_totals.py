@@ -0,0 +1,54 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('photos', '0007_stockcount_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YearTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='год')),
+                ('photo', models.PositiveIntegerField(default=0, verbose_name='Фото')),
+                ('video', models.PositiveIntegerField(default=0, verbose_name='Видео')),
+                ('income', models.FloatField(default=0, verbose_name='Доход')),
+                ('upload_photo', models.IntegerField(default=0, verbose_name='Загружено фото')),
+                ('upload_video', models.IntegerField(default=0, verbose_name='Загружено видео')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='year_total', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='год')),
+                ('month', models.IntegerField(verbose_name='месяц')),
+                ('photo', models.PositiveIntegerField(default=0, verbose_name='Фото')),
+                ('video', models.PositiveIntegerField(default=0, verbose_name='Видео')),
+                ('income', models.FloatField(default=0, verbose_name='Доход')),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='month_total', to='photos.stock', verbose_name='Сток')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='month_total', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='yeartotal',
+            constraint=models.UniqueConstraint(fields=('user', 'year'), name='uniq_year_total'),
+        ),
+        migrations.AddIndex(
+            model_name='monthtotal',
+            index=models.Index(fields=['user', 'year', 'month'], name='month_total_user_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthtotal',
+            constraint=models.UniqueConstraint(fields=('stock', 'year', 'month'), name='uniq_stock_month_total'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:40
+
+from django.db import migrations
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def fill_totals(apps, schema_editor):
+    Day = apps.get_model('photos', 'Day')
+    StockCount = apps.get_model('photos', 'StockCount')
+    MonthTotal = apps.get_model('photos', 'MonthTotal')
+    YearTotal = apps.get_model('photos', 'YearTotal')
+
+    counts = StockCount.objects.annotate(year=ExtractYear('date'),
+                                         month=ExtractMonth('date'))
+    sums = {'photo': Sum('photo'),
+            'video': Sum('video'),
+            'income': Sum('income')}
+    MonthTotal.objects.bulk_create(
+        (MonthTotal(user_id=row['user'],
+                    stock_id=row['stock'],
+                    year=row['year'],
+                    month=row['month'],
+                    photo=row['photo'] or 0,
+                    video=row['video'] or 0,
+                    income=row['income'] or 0)
+         for row in (counts.values('user', 'stock', 'year', 'month')
+                     .annotate(**sums).order_by())),
+        batch_size=1000,
+    )
+    years = {}
+    for row in counts.values('user', 'year').annotate(**sums).order_by():
+        years[row['user'], row['year']] = YearTotal(
+            user_id=row['user'],
+            year=row['year'],
+            photo=row['photo'] or 0,
+            video=row['video'] or 0,
+            income=row['income'] or 0,
+        )
+    uploads = (Day.objects
+               .values('month__user', 'month__year_list')
+               .annotate(photo=Sum('photo'), video=Sum('video'))
+               .order_by())
+    for row in uploads:
+        key = (row['month__user'], row['month__year_list'])
+        if key not in years:
+            years[key] = YearTotal(user_id=key[0], year=key[1])
+        years[key].upload_photo = row['photo'] or 0
+        years[key].upload_video = row['video'] or 0
+    YearTotal.objects.bulk_create(years.values(), batch_size=1000)
+
+
+def clear_totals(apps, schema_editor):
+    apps.get_model('photos', 'MonthTotal').objects.all().delete()
+    apps.get_model('photos', 'YearTotal').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0008_month_year_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_totals, clear_totals),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0009_fill_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='month',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменен'),
+            preserve_default=False,
+        ),
+    ]
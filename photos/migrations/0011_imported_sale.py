@@ -0,0 +1,28 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('photos', '0010_month_modified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedSale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=40, verbose_name='Отпечаток')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='imported_sale', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='importedsale',
+            constraint=models.UniqueConstraint(fields=('user', 'digest'), name='uniq_imported_sale'),
+        ),
+    ]
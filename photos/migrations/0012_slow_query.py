@@ -0,0 +1,32 @@
+# Generated by Django 3.2.9 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0011_imported_sale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Время')),
+                ('view', models.CharField(max_length=200, verbose_name='Представление')),
+                ('path', models.CharField(max_length=500, verbose_name='Адрес')),
+                ('duration', models.FloatField(verbose_name='Длительность, мс')),
+                ('sql', models.TextField(verbose_name='Запрос')),
+                ('params', models.TextField(blank=True, verbose_name='Параметры')),
+                ('explain', models.TextField(blank=True, verbose_name='План')),
+                ('stack', models.TextField(blank=True, verbose_name='Стек')),
+            ],
+            options={
+                'verbose_name': 'медленный запрос',
+                'verbose_name_plural': 'медленные запросы',
+                'ordering': ('-pk',),
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.9 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0012_slow_query'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run', models.CharField(max_length=32, verbose_name='Импорт')),
+                ('content', models.CharField(max_length=40, verbose_name='Содержимое')),
+                ('seen', models.PositiveIntegerField(default=0, verbose_name='Встречено')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='importedsale',
+            name='run',
+            field=models.CharField(default='', max_length=32, verbose_name='Импорт'),
+        ),
+        migrations.AddConstraint(
+            model_name='importoccurrence',
+            constraint=models.UniqueConstraint(fields=('run', 'content'), name='uniq_import_occurrence'),
+        ),
+    ]
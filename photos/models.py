@@ -2,8 +2,11 @@ import calendar
 import datetime as dt
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
+from .cache import bump_data_version
 from .vars import months_list as months
 
 User = get_user_model()
@@ -19,6 +22,20 @@ class Month(models.Model):
     year_list = models.IntegerField(verbose_name='год',
                                     blank=False,
                                     null=False)
+    modified = models.DateTimeField(verbose_name='Изменен',
+                                    auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'month_list', 'year_list'],
+                name='uniq_month',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'year_list', 'month_list'],
+                         name='month_user_year_idx'),
+        ]
 
     def __str__(self):
         return f'{months[self.month_list - 1]} {self.year_list}'
@@ -37,11 +54,123 @@ class Day(models.Model):
 
     class Meta:
         ordering = ('pk',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['month', 'date'],
+                name='uniq_day',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['month', 'date', 'photo', 'video'],
+                         name='day_month_cover_idx'),
+        ]
 
     def __str__(self):
         return (f'{self.date} {months[self.month.month_list - 1]}'
                 f'{self.month.year_list}')
 
+    @property
+    def full_date(self):
+        return dt.date(self.month.year_list, self.month.month_list, self.date)
+
+
+def get_or_create_day(user, year, month, date):
+    month_obj, _ = Month.objects.get_or_create(user=user,
+                                               month_list=month,
+                                               year_list=year)
+    day, _ = Day.objects.get_or_create(month=month_obj,
+                                       date=date,
+                                       defaults={'photo': 0, 'video': 0})
+    day.month = month_obj
+    return day
+
+
+def get_or_create_days(user, dates):
+    """Возвращает словарь {дата: Day} для набора дат одним пакетом.
+
+    Недостающие месяцы и дни создаются bulk_create, поэтому число
+    запросов не зависит от количества дат.
+    """
+    dates = set(dates)
+    if not dates:
+        return {}
+    months_by_period = get_or_create_months(
+        user, {(date.year, date.month) for date in dates}
+    )
+    days = Day.objects.filter(month__in=months_by_period.values(),
+                              date__in={date.day for date in dates})
+    found = get_days_by_date(days, months_by_period.values())
+    missing = [Day(month=months_by_period[date.year, date.month],
+                   date=date.day, photo=0, video=0)
+               for date in dates - found.keys()]
+    if missing:
+        Day.objects.bulk_create(missing, ignore_conflicts=True)
+        found = get_days_by_date(days, months_by_period.values())
+    return found
+
+
+def get_days_by_date(days, months_objs):
+    months_by_pk = {month_obj.pk: month_obj for month_obj in months_objs}
+    found = {}
+    for day in days.order_by():
+        day.month = months_by_pk[day.month_id]
+        found[day.full_date] = day
+    return found
+
+
+def get_or_create_months(user, periods):
+    """Возвращает словарь {(год, месяц): Month}, создавая недостающие."""
+    months_qs = Month.objects.filter(
+        user=user,
+        year_list__in={year for year, _ in periods},
+        month_list__in={month for _, month in periods},
+    ).order_by()
+    found = {(month_obj.year_list, month_obj.month_list): month_obj
+             for month_obj in months_qs}
+    missing = [Month(user=user, year_list=year, month_list=month)
+               for year, month in periods - found.keys()]
+    if missing:
+        Month.objects.bulk_create(missing, ignore_conflicts=True)
+        found = {(month_obj.year_list, month_obj.month_list): month_obj
+                 for month_obj in months_qs.all()}
+    return found
+
+
+def set_uploads(user, year, month, date, photo, video):
+    """Записывает загрузки за день и переносит разницу в годовой итог."""
+    days = set_month_uploads(user=user, year=year, month=month,
+                             uploads={date: (photo, video)})
+    return days[dt.date(year, month, date)]
+
+
+def set_month_uploads(user, year, month, uploads):
+    """Записывает загрузки за несколько дней месяца одной транзакцией.
+
+    uploads - словарь {число: (фото, видео)}. Дни сохраняются одним
+    bulk_update, разница с прежними значениями переносится в годовой
+    итог. Возвращает словарь {дата: Day}.
+    """
+    dates = {dt.date(year, month, date) for date in uploads}
+    with transaction.atomic():
+        days = get_or_create_days(user, dates)
+        rows = (Day.objects.select_for_update()
+                .filter(pk__in=[day.pk for day in days.values()])
+                .values_list('pk', 'photo', 'video')
+                .order_by())
+        locked = {pk: (photo, video) for pk, photo, video in rows}
+        add_photo = add_video = 0
+        for date, day in days.items():
+            old_photo, old_video = locked[day.pk]
+            day.photo, day.video = uploads[date.day]
+            add_photo += day.photo - (old_photo or 0)
+            add_video += day.video - (old_video or 0)
+        Day.objects.bulk_update(days.values(), ['photo', 'video'])
+        add_to_row(YearTotal, {'user': user, 'year': year},
+                   upload_photo=add_photo, upload_video=add_video)
+        touch_month(next(iter(days.values())).month_id)
+    bump_data_version(user.pk)
+    return days
+
 
 def get_today():
     year = dt.datetime.today().year
@@ -93,6 +222,150 @@ class Stock(models.Model):
         return self.pseudo_name
 
 
+def touch_month(month_id):
+    """Отмечает изменение данных месяца для условных GET-запросов."""
+    Month.objects.filter(pk=month_id).update(modified=timezone.now())
+
+
+def add_to_row(model, lookup, create=None, **values):
+    """Атомарно прибавляет values к строке model, найденной по lookup.
+
+    Существующая строка увеличивается одним UPDATE с F-выражениями,
+    новая создается; при гонке двух вставок уникальный индекс отклоняет
+    вторую, и она превращается в UPDATE.
+    """
+    values = {field: value or 0 for field, value in values.items()}
+    rows = model.objects.filter(**lookup)
+    increments = {}
+    for field, value in values.items():
+        if isinstance(model._meta.get_field(field), models.FloatField):
+            output_field = models.FloatField()
+        else:
+            output_field = models.IntegerField()
+        increments[field] = Coalesce(field, 0,
+                                     output_field=output_field) + value
+    if rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **(create or {}), **values)
+    except IntegrityError:
+        rows.update(**increments)
+
+
+def add_to_rows(model, fields, increments, defaults=None):
+    """Пакетный вариант add_to_row.
+
+    increments - словарь {ключ: {поле: прибавка}}, где ключ - кортеж
+    значений fields. Существующие строки блокируются и обновляются
+    одним bulk_update. Недостающие сначала вставляются с нулями и
+    дополнительными полями из defaults[ключ], пропуская конфликты с
+    параллельной вставкой, и затем блокируются и увеличиваются так же.
+    Вызывать внутри транзакции.
+    """
+    if not increments:
+        return
+    existing = lock_rows(model, fields, increments)
+    missing = increments.keys() - existing.keys()
+    if missing:
+        value_fields = next(iter(increments.values()))
+        model.objects.bulk_create(
+            (model(**dict(zip(fields, key)),
+                   **(defaults or {}).get(key, {}),
+                   **dict.fromkeys(value_fields, 0))
+             for key in missing),
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        existing.update(lock_rows(model, fields,
+                                  {key: increments[key] for key in missing}))
+    for key, values in increments.items():
+        row = existing[key]
+        for field, value in values.items():
+            setattr(row, field, (getattr(row, field) or 0) + value)
+    model.objects.bulk_update(existing.values(),
+                              list(next(iter(increments.values()))),
+                              batch_size=500)
+
+
+def lock_rows(model, fields, keys):
+    """Блокирует и возвращает строки model по ключам {ключ: строка}.
+
+    Строки блокируются в порядке pk, чтобы две пачки с общими строками
+    не взяли блокировки в разном порядке и не ждали друг друга вечно.
+    """
+    lookup = {f'{field}__in': {key[index] for key in keys}
+              for index, field in enumerate(fields)}
+    rows = {}
+    for row in (model.objects.select_for_update().filter(**lookup)
+                .order_by('pk')):
+        key = tuple(getattr(row, field) for field in fields)
+        if key in keys:
+            rows[key] = row
+    return rows
+
+
+class StockCountQuerySet(models.QuerySet):
+    def add(self, stock, day, photo=0, video=0, income=0):
+        """Прибавляет продажи стока за день вместе с итогами."""
+        sale_date = day.full_date
+        with transaction.atomic():
+            add_to_row(StockCount, {'stock': stock, 'day': day},
+                       create={'user_id': stock.user_id, 'date': sale_date},
+                       photo=photo, video=video, income=income)
+            add_to_row(MonthTotal,
+                       {'stock': stock,
+                        'year': sale_date.year,
+                        'month': sale_date.month},
+                       create={'user_id': stock.user_id},
+                       photo=photo, video=video, income=income)
+            add_to_row(YearTotal,
+                       {'user_id': stock.user_id, 'year': sale_date.year},
+                       photo=photo, video=video, income=income)
+            touch_month(day.month_id)
+        bump_data_version(stock.user_id)
+
+    def add_many(self, user, sales):
+        """Прибавляет пачку продаж пользователя вместе с итогами.
+
+        sales - словарь {(stock_id, дата): (фото, видео, доход)}.
+        Число запросов не зависит от размера пачки.
+        """
+        if not sales:
+            return
+        days = get_or_create_days(user, {date for _, date in sales})
+        counts, count_defaults = {}, {}
+        month_totals, year_totals = {}, {}
+        for (stock_id, date), (photo, video, income) in sales.items():
+            values = {'photo': photo or 0,
+                      'video': video or 0,
+                      'income': income or 0}
+            key = (stock_id, days[date].pk)
+            counts[key] = values
+            count_defaults[key] = {'user_id': user.pk, 'date': date}
+            add_values(month_totals, (stock_id, date.year, date.month),
+                       values)
+            add_values(year_totals, (user.pk, date.year), values)
+        with transaction.atomic():
+            add_to_rows(StockCount, ('stock_id', 'day_id'), counts,
+                        defaults=count_defaults)
+            add_to_rows(MonthTotal, ('stock_id', 'year', 'month'),
+                        month_totals,
+                        defaults=dict.fromkeys(month_totals,
+                                               {'user_id': user.pk}))
+            add_to_rows(YearTotal, ('user_id', 'year'), year_totals)
+            Month.objects.filter(
+                pk__in={day.month_id for day in days.values()}
+            ).update(modified=timezone.now())
+        bump_data_version(user.pk)
+
+
+def add_values(totals, key, values):
+    total = totals.setdefault(key, dict.fromkeys(values, 0))
+    for field, value in values.items():
+        total[field] += value
+
+
 class StockCount(models.Model):
     stock = models.ForeignKey('Stock',
                               on_delete=models.CASCADE,
@@ -102,6 +375,11 @@ class StockCount(models.Model):
                             on_delete=models.CASCADE,
                             related_name='stock_count_day',
                             verbose_name='Дата')
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='stock_count',
+                             verbose_name='Пользователь')
+    date = models.DateField(verbose_name='Дата продажи')
     photo = models.PositiveIntegerField(verbose_name='Фото',
                                         blank=True,
                                         null=True)
@@ -111,3 +389,156 @@ class StockCount(models.Model):
     income = models.FloatField(verbose_name='Доход',
                                blank=True,
                                null=True)
+
+    objects = StockCountQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['stock', 'day'],
+                name='uniq_stock_day',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['stock', 'date', 'photo', 'video', 'income'],
+                         name='count_stock_date_cover_idx'),
+            models.Index(fields=['user', 'date'],
+                         name='count_user_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.date is None:
+            self.date = self.day.full_date
+        if self.user_id is None:
+            self.user_id = self.stock.user_id
+        super().save(*args, **kwargs)
+
+
+class MonthTotal(models.Model):
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='month_total',
+                             verbose_name='Пользователь')
+    stock = models.ForeignKey('Stock',
+                              on_delete=models.CASCADE,
+                              related_name='month_total',
+                              verbose_name='Сток')
+    year = models.IntegerField(verbose_name='год')
+    month = models.IntegerField(verbose_name='месяц')
+    photo = models.PositiveIntegerField(verbose_name='Фото', default=0)
+    video = models.PositiveIntegerField(verbose_name='Видео', default=0)
+    income = models.FloatField(verbose_name='Доход', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['stock', 'year', 'month'],
+                name='uniq_stock_month_total',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'],
+                         name='month_total_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.stock} {months[self.month - 1]} {self.year}'
+
+
+class YearTotal(models.Model):
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='year_total',
+                             verbose_name='Пользователь')
+    year = models.IntegerField(verbose_name='год')
+    photo = models.PositiveIntegerField(verbose_name='Фото', default=0)
+    video = models.PositiveIntegerField(verbose_name='Видео', default=0)
+    income = models.FloatField(verbose_name='Доход', default=0)
+    upload_photo = models.IntegerField(verbose_name='Загружено фото',
+                                       default=0)
+    upload_video = models.IntegerField(verbose_name='Загружено видео',
+                                       default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'year'],
+                name='uniq_year_total',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.year}'
+
+
+class ImportedSale(models.Model):
+    """Отпечаток уже загруженной строки отчета стока.
+
+    Повторная загрузка того же отчета пропускает строки с известным
+    отпечатком, поэтому импорт можно безопасно перезапускать.
+    """
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='imported_sale',
+                             verbose_name='Пользователь')
+    digest = models.CharField(verbose_name='Отпечаток', max_length=40)
+    # импорт, записавший строку: по нему одновременные загрузки одного
+    # отчета узнают, какие отпечатки вставили именно они
+    run = models.CharField(verbose_name='Импорт', max_length=32,
+                           default='')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'digest'],
+                name='uniq_imported_sale',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.digest}'
+
+
+class ImportOccurrence(models.Model):
+    """Сколько раз строка с таким содержимым уже встретилась в идущем
+    импорте.
+
+    Счетчики лежат в базе, а не в памяти, и удаляются в конце импорта.
+    """
+    run = models.CharField(verbose_name='Импорт', max_length=32)
+    content = models.CharField(verbose_name='Содержимое', max_length=40)
+    seen = models.PositiveIntegerField(verbose_name='Встречено', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['run', 'content'],
+                name='uniq_import_occurrence',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.run} {self.content}'
+
+
+class SlowQuery(models.Model):
+    """Медленный запрос к базе с планом выполнения.
+
+    Хранятся только последние PHOTOS_SLOW_QUERY_LIMIT записей.
+    """
+    created = models.DateTimeField(verbose_name='Время', auto_now_add=True)
+    view = models.CharField(verbose_name='Представление', max_length=200)
+    path = models.CharField(verbose_name='Адрес', max_length=500)
+    duration = models.FloatField(verbose_name='Длительность, мс')
+    sql = models.TextField(verbose_name='Запрос')
+    params = models.TextField(verbose_name='Параметры', blank=True)
+    explain = models.TextField(verbose_name='План', blank=True)
+    stack = models.TextField(verbose_name='Стек', blank=True)
+
+    class Meta:
+        ordering = ('-pk',)
+        verbose_name = 'медленный запрос'
+        verbose_name_plural = 'медленные запросы'
+
+    def __str__(self):
+        return f'{self.view} {self.duration:.0f} мс'
@@ -0,0 +1,30 @@
+from django.conf import settings
+
+from .cache import cached_result
+from .models import Stock
+
+
+def get_stocks(user_id):
+    """Стоки пользователя из кеша текущей версии его данных.
+
+    Версию сбрасывает сигнал stock_changed. Срок жизни ограничен, чтобы
+    процесс, не увидевший сброса (кеш в памяти другого воркера), не
+    показывал старый список дольше PHOTOS_STOCKS_CACHE_TIMEOUT.
+    """
+    return cached_result(
+        user_id,
+        ('stocks',),
+        lambda: list(Stock.objects.filter(user_id=user_id).order_by('pk')),
+        timeout=settings.PHOTOS_STOCKS_CACHE_TIMEOUT,
+    )
+
+
+def stock_exists(user_id, **lookup):
+    """Есть ли у пользователя сток с такими полями.
+
+    Без пользователя проверяются стоки всех пользователей.
+    """
+    stocks = Stock.objects.filter(**lookup)
+    if user_id is not None:
+        stocks = stocks.filter(user_id=user_id)
+    return stocks.exists()
@@ -0,0 +1,64 @@
+from .models import Day, Month
+from .registry import get_stocks
+
+
+class Repository:
+    """Месяцы, дни и стоки пользователя, загруженные за один запрос.
+
+    Каждая сущность читается из базы один раз, повторные обращения
+    обходятся без запросов. После записи в рамках того же запроса
+    нужно вызвать clear().
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.clear()
+
+    def clear(self):
+        self.months = {}
+        self.days = {}
+        self.stocks = None
+
+    def get_month(self, year, month):
+        """Сохраненный месяц или несохраненная заготовка."""
+        if (year, month) not in self.months:
+            self.months[year, month] = (
+                Month.objects.filter(user=self.user,
+                                     month_list=month,
+                                     year_list=year).last()
+                or Month(user=self.user, month_list=month, year_list=year)
+            )
+        return self.months[year, month]
+
+    def get_days(self, year, month):
+        """Сохраненные дни месяца в виде словаря {число: Day}."""
+        if (year, month) not in self.days:
+            month_obj = self.get_month(year, month)
+            days = {}
+            if month_obj.pk:
+                for day in Day.objects.filter(month=month_obj, date__gt=0):
+                    day.month = month_obj
+                    days[day.date] = day
+            self.days[year, month] = days
+        return self.days[year, month]
+
+    def get_day(self, year, month, date):
+        return self.get_days(year, month).get(date)
+
+    def get_stocks(self):
+        if self.stocks is None:
+            self.stocks = get_stocks(self.user.pk)
+        return self.stocks
+
+    def get_stock(self, name):
+        for stock in self.get_stocks():
+            if stock.name == name:
+                return stock
+        return None
+
+
+def get_repository(request):
+    """Репозиторий текущего запроса, создается при первом обращении."""
+    if '_repository' not in request.__dict__:
+        request._repository = Repository(request.user)
+    return request._repository
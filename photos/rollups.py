@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .cache import bump_data_version
+from .models import Day, MonthTotal, StockCount, YearTotal, lock_rows
+
+TOTAL_FIELDS = ('photo', 'video', 'income')
+
+
+@transaction.atomic
+def rebuild_totals(users=None):
+    """Пересчитывает помесячные и годовые итоги с нуля.
+
+    users ограничивает пересчет списком пользователей, по умолчанию
+    итоги пересчитываются для всех. Закешированные графики
+    затронутых пользователей становятся недействительными.
+    """
+    counts = StockCount.objects.all()
+    days = Day.objects.all()
+    month_totals = MonthTotal.objects.all()
+    year_totals = YearTotal.objects.all()
+    if users is not None:
+        counts = counts.filter(user__in=users)
+        days = days.filter(month__user__in=users)
+        month_totals = month_totals.filter(user__in=users)
+        year_totals = year_totals.filter(user__in=users)
+    counts = counts.annotate(year=ExtractYear('date'),
+                             month=ExtractMonth('date'))
+    sums = {'photo': Sum('photo'),
+            'video': Sum('video'),
+            'income': Sum('income')}
+    by_month = (counts.values('user', 'stock', 'year', 'month')
+                .annotate(**sums).order_by())
+    by_year = counts.values('user', 'year').annotate(**sums).order_by()
+    uploads = (days.values('month__user', 'month__year_list')
+               .annotate(photo=Sum('photo'), video=Sum('video'))
+               .order_by())
+
+    years = {}
+    for row in by_year:
+        years[row['user'], row['year']] = YearTotal(
+            user_id=row['user'],
+            year=row['year'],
+            photo=row['photo'] or 0,
+            video=row['video'] or 0,
+            income=row['income'] or 0,
+        )
+    for row in uploads:
+        key = (row['month__user'], row['month__year_list'])
+        if key not in years:
+            years[key] = YearTotal(user_id=key[0], year=key[1])
+        years[key].upload_photo = row['photo'] or 0
+        years[key].upload_video = row['video'] or 0
+
+    affected = {user_id for user_id, _ in years}
+    affected.update(year_totals.values_list('user_id', flat=True))
+    month_totals.delete()
+    year_totals.delete()
+    MonthTotal.objects.bulk_create(
+        (MonthTotal(user_id=row['user'],
+                    stock_id=row['stock'],
+                    year=row['year'],
+                    month=row['month'],
+                    photo=row['photo'] or 0,
+                    video=row['video'] or 0,
+                    income=row['income'] or 0)
+         for row in by_month.iterator()),
+        batch_size=1000,
+    )
+    YearTotal.objects.bulk_create(years.values(), batch_size=1000)
+    for user_id in affected:
+        bump_data_version(user_id)
+
+
+@transaction.atomic
+def subtract_stock_totals(stock):
+    """Вычитает продажи стока из годовых итогов пользователя.
+
+    Вызывается перед удалением стока: его MonthTotal удаляются каскадом,
+    а YearTotal иначе хранил бы его продажи до rebuild_totals.
+    """
+    by_year = (MonthTotal.objects.filter(stock=stock).values('year')
+               .annotate(**{field: Sum(field) for field in TOTAL_FIELDS})
+               .order_by())
+    sums = {(stock.user_id, row['year']): row for row in by_year}
+    if not sums:
+        return
+    rows = lock_rows(YearTotal, ('user_id', 'year'), sums)
+    for key, row in rows.items():
+        for field in TOTAL_FIELDS:
+            setattr(row, field, getattr(row, field) - (sums[key][field] or 0))
+    YearTotal.objects.bulk_update(rows.values(), TOTAL_FIELDS)
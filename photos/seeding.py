@@ -0,0 +1,77 @@
+import calendar
+import datetime as dt
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .models import Day, Month, Stock, StockCount, User
+from .rollups import rebuild_totals
+
+USERNAME = 'seed_user_{number}'
+PASSWORD = 'seed-password'
+BATCH_SIZE = 2000
+
+
+@transaction.atomic
+def seed(users=1, stocks=3, years=1, start_year=2022, seed_value=0,
+         sale_chance=0.5):
+    """Создает одинаковые при одинаковых параметрах тестовые данные.
+
+    На каждого из users пользователей заводится stocks стоков, а на
+    каждый день years лет - загрузки и, с вероятностью sale_chance,
+    продажи по каждому стоку. Прежние данные этих пользователей
+    удаляются. Возвращает список пользователей.
+    """
+    rng = random.Random(seed_value)
+    usernames = [USERNAME.format(number=number) for number in range(users)]
+    User.objects.filter(username__in=usernames).delete()
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        User(username=username, password=password) for username in usernames
+    )
+    seeded = list(User.objects.filter(username__in=usernames)
+                  .order_by('username'))
+    for user in seeded:
+        seed_user(user, rng, stocks, range(start_year, start_year + years),
+                  sale_chance)
+    rebuild_totals(users=seeded)
+    return seeded
+
+
+def seed_user(user, rng, stocks, years, sale_chance):
+    Stock.objects.bulk_create(
+        Stock(user=user, name=f'stock{number}', pseudo_name=f'Сток {number}')
+        for number in range(stocks)
+    )
+    stock_ids = list(Stock.objects.filter(user=user)
+                     .order_by('pk').values_list('pk', flat=True))
+    Month.objects.bulk_create(Month(user=user, year_list=year,
+                                    month_list=month)
+                              for year in years for month in range(1, 13))
+    for month_obj in Month.objects.filter(user=user).order_by('pk'):
+        days_in_month = calendar.monthrange(month_obj.year_list,
+                                            month_obj.month_list)[1]
+        Day.objects.bulk_create(
+            Day(month=month_obj, date=date,
+                photo=rng.randint(0, 20), video=rng.randint(0, 5))
+            for date in range(1, days_in_month + 1)
+        )
+    counts = []
+    days = (Day.objects.filter(month__user=user)
+            .select_related('month').order_by('pk'))
+    for day in days.iterator():
+        for stock_id in stock_ids:
+            if rng.random() >= sale_chance:
+                continue
+            counts.append(StockCount(
+                stock_id=stock_id, day=day, user=user,
+                date=dt.date(day.month.year_list, day.month.month_list,
+                             day.date),
+                photo=rng.randint(0, 10), video=rng.randint(0, 3),
+                income=round(rng.uniform(0, 50), 2),
+            ))
+            if len(counts) >= BATCH_SIZE:
+                StockCount.objects.bulk_create(counts)
+                counts = []
+    StockCount.objects.bulk_create(counts)
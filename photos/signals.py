@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import bump_data_version
+from .models import Stock
+from .rollups import subtract_stock_totals
+
+
+@receiver(pre_delete, sender=Stock)
+def stock_deleted(sender, instance, **kwargs):
+    # итоги месяцев стока удалятся каскадом, годовые остаются
+    subtract_stock_totals(instance)
+
+
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+def stock_changed(sender, instance, **kwargs):
+    bump_data_version(instance.user_id)
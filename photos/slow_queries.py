@@ -0,0 +1,103 @@
+import time
+import traceback
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.db import DatabaseError, connections, transaction
+
+from .models import SlowQuery
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+STACK_LIMIT = 15
+REDACTED = '<скрыто>'
+
+
+class SlowQueryRecorder:
+    """execute_wrapper, запоминающий запросы дольше порога.
+
+    Запросы только складываются в память; планы и запись в базу
+    делает save() после ответа, чтобы не мешать самому запросу.
+    """
+
+    def __init__(self, threshold_ms):
+        self.threshold = threshold_ms / 1000
+        self.samples = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                sensitive = is_sensitive(sql)
+                self.samples.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    # параметры сессий и пользователей не сохраняются
+                    'params': None if many or sensitive else params,
+                    'sensitive': sensitive,
+                    'duration': duration * 1000,
+                    'stack': get_stack(),
+                })
+
+    def save(self, view, path):
+        if not self.samples:
+            return
+        SlowQuery.objects.bulk_create(
+            SlowQuery(view=view,
+                      path=path[:500],
+                      duration=sample['duration'],
+                      sql=sample['sql'],
+                      params=(REDACTED if sample['sensitive']
+                              else repr(sample['params'] or '')),
+                      explain=explain(connections[sample['alias']],
+                                      sample['sql'], sample['params']),
+                      stack=sample['stack'])
+            for sample in self.samples
+        )
+        trim_slow_queries()
+
+
+def is_sensitive(sql):
+    """Запрос к таблице сессий или пользователей."""
+    tables = (Session._meta.db_table, get_user_model()._meta.db_table)
+    return any(f'"{table}"' in sql for table in tables)
+
+
+def get_stack():
+    """Кадры проекта, из которых пришел запрос, без Django и библиотек."""
+    frames = [frame for frame in traceback.extract_stack()[:-2]
+              if str(settings.BASE_DIR) in frame.filename
+              and 'site-packages' not in frame.filename]
+    return ''.join(traceback.format_list(frames[-STACK_LIMIT:]))
+
+
+def explain(connection, sql, params):
+    """План запроса для SQLite и PostgreSQL, иначе пустая строка."""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if (prefix is None or params is None
+            or not sql.lstrip().upper().startswith(EXPLAINABLE)):
+        return ''
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+    except DatabaseError as error:
+        return f'EXPLAIN не выполнен: {error}'
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def trim_slow_queries():
+    """Оставляет только последние записи, как кольцевой буфер."""
+    limit = settings.PHOTOS_SLOW_QUERY_LIMIT
+    border = (SlowQuery.objects.order_by('-pk')
+              .values_list('pk', flat=True)[limit:limit + 1].first())
+    if border is not None:
+        SlowQuery.objects.filter(pk__lte=border).delete()
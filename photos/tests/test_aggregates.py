@@ -0,0 +1,89 @@
+from django.test import TestCase
+
+from photos.aggregates import month_diagram, month_totals, year_graphic
+from photos.models import Day, Month, Stock, StockCount, User
+from photos.vars import months_list as months
+
+
+class YearGraphicTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.year = 2022
+        cls.stock = Stock.objects.create(
+            user=cls.user, name='Pond5', pseudo_name='Pond5'
+        )
+        for month_no, date in ((3, 1), (3, 2), (11, 30)):
+            month, _ = Month.objects.get_or_create(
+                user=cls.user, year_list=cls.year, month_list=month_no
+            )
+            day = Day.objects.create(date=date, month=month,
+                                     photo=0, video=0)
+            StockCount.objects.add(stock=cls.stock, day=day,
+                                   photo=2, video=1, income=1.5)
+
+    def test_year_graphic_single_query(self):
+        """График по месяцам строится одним запросом"""
+        with self.assertNumQueries(1):
+            result = year_graphic(year=self.year, stock=self.stock)
+        self.assertEqual(result['labels'], list(months))
+        self.assertEqual(result['photoes'][2], 4)
+        self.assertEqual(result['videos'][2], 2)
+        self.assertEqual(result['incomes'][2], 3.0)
+        self.assertEqual(result['photoes'][10], 2)
+        self.assertEqual(sum(result['photoes']), 6)
+        self.assertEqual(result['incomes'][0], 0)
+
+    def test_year_graphic_does_not_create_rows(self):
+        """Пустой год заполняется нулями без создания записей"""
+        months_before = Month.objects.count()
+        result = year_graphic(year=self.year + 1, stock=self.stock)
+        self.assertEqual(result['photoes'], [0] * 12)
+        self.assertEqual(Month.objects.count(), months_before)
+
+
+class MonthTotalsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.year = 2022
+        cls.month_no = 7
+        cls.month = Month.objects.create(
+            user=cls.user, year_list=cls.year, month_list=cls.month_no
+        )
+        cls.other_month = Month.objects.create(
+            user=cls.user, year_list=cls.year, month_list=cls.month_no + 1
+        )
+        cls.stocks = [Stock.objects.create(user=cls.user,
+                                           name=f'stock{number}',
+                                           pseudo_name=f'сток{number}')
+                      for number in range(3)]
+        for date in (1, 2):
+            day = Day.objects.create(date=date, month=cls.month,
+                                     photo=0, video=0)
+            StockCount.objects.add(stock=cls.stocks[0], day=day,
+                                   photo=1, video=2, income=3)
+        day = Day.objects.create(date=1, month=cls.other_month,
+                                 photo=0, video=0)
+        StockCount.objects.add(stock=cls.stocks[1], day=day,
+                               photo=5, video=5, income=5)
+
+    def test_month_totals_single_query(self):
+        """Итоги по всем стокам считаются одним запросом"""
+        with self.assertNumQueries(1):
+            totals = month_totals(user=self.user, year=self.year,
+                                  month=self.month_no)
+        self.assertEqual([total['pseudo_name'] for total in totals],
+                         ['сток0', 'сток1', 'сток2'])
+        self.assertEqual((totals[0]['photo'], totals[0]['video'],
+                          totals[0]['income']), (2, 4, 6.0))
+        self.assertEqual((totals[1]['photo'], totals[1]['video'],
+                          totals[1]['income']), (0, 0, 0.0))
+
+    def test_month_diagram(self):
+        result = month_diagram(user=self.user, year=self.year,
+                               month=self.month_no + 1)
+        self.assertEqual(result['labels'], ['сток0', 'сток1', 'сток2'])
+        self.assertEqual(result['photoes'], [0, 5, 0])
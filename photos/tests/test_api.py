@@ -0,0 +1,97 @@
+import json
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from photos.models import (Day, MonthTotal, Stock, StockCount, User,
+                           get_or_create_day, set_uploads)
+
+
+class DayCellTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.stock = Stock.objects.create(
+            user=cls.user, name='Pond5', pseudo_name='P5'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        set_uploads(user=self.user, year=2022, month=7, date=1,
+                    photo=2, video=1)
+
+    def patch(self, date, data):
+        return self.authorized_client.patch(
+            reverse('api_day', args=(2022, 7, date)),
+            json.dumps(data), content_type='application/json'
+        )
+
+    def test_patch_uploads(self):
+        """Ответ содержит только ячейку и итоги месяца"""
+        response = self.patch(3, {'photo': 5})
+        self.assertEqual(response.json(), {'date': '2022-07-03',
+                                           'photo': 5,
+                                           'video': 0,
+                                           'month': {'photo': 7,
+                                                     'video': 1}})
+        response = self.patch(1, {'video': 4})
+        self.assertEqual(response.json()['photo'], 2)
+        self.assertEqual(response.json()['month'], {'photo': 7, 'video': 4})
+        self.assertEqual(Day.objects.get(date=1).video, 4)
+
+    def test_patch_sales(self):
+        day = get_or_create_day(user=self.user, year=2022, month=7, date=1)
+        StockCount.objects.add(stock=self.stock, day=day,
+                               photo=3, video=1, income=5)
+        response = self.patch(1, {'stock': 'Pond5', 'photo': 1,
+                                  'income': 2.5})
+        self.assertEqual(response.json(), {'date': '2022-07-01',
+                                           'stock': 'Pond5',
+                                           'photo': 1,
+                                           'video': 1,
+                                           'income': 2.5,
+                                           'month': {'photo': 1,
+                                                     'video': 1,
+                                                     'income': 2.5}})
+        total = MonthTotal.objects.get(stock=self.stock)
+        self.assertEqual((total.photo, total.income), (1, 2.5))
+
+    def test_invalid_requests(self):
+        cases = {
+            'value': (1, {'photo': 100}, 400),
+            'date': (32, {'photo': 1}, 404),
+            'stock': (1, {'stock': 'Unknown', 'photo': 1}, 404),
+        }
+        for name, (date, data, status) in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(self.patch(date, data).status_code, status)
+        response = self.authorized_client.post(
+            reverse('api_day', args=(2022, 7, 1)), {'photo': 1}
+        )
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(Day.objects.get(date=1).photo, 2)
+
+
+class SeriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        Stock.objects.create(user=cls.user, name='Pond5', pseudo_name='P5')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_period_out_of_range(self):
+        urls = (reverse('api_daily', args=('Pond5', 2022, 13)),
+                reverse('api_diagram', args=(2022, 13)),
+                reverse('api_total', args=(2022, 0)))
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.authorized_client.get(url).status_code,
+                                 404)
+        url = reverse('api_daily', args=('Pond5', 2022, 12))
+        self.assertEqual(self.authorized_client.get(url).status_code, 200)
@@ -0,0 +1,55 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from photos.models import Day, MonthTotal, StockCount, User, YearTotal
+
+
+class SeedDataTest(TestCase):
+    def seed(self, seed=0):
+        call_command('seed_data', '--users', '2', '--stocks', '2',
+                     '--years', '1', '--seed', str(seed), stdout=StringIO())
+        return list(StockCount.objects.order_by('user__username', 'date',
+                                                'stock__name')
+                    .values_list('user__username', 'stock__name', 'date',
+                                 'photo', 'video', 'income'))
+
+    def test_seed_is_deterministic(self):
+        """Одинаковое зерно дает одинаковые данные"""
+        first = self.seed()
+        self.assertEqual(User.objects.filter(
+            username__startswith='seed_user_'
+        ).count(), 2)
+        self.assertEqual(Day.objects.count(), 2 * 365)
+        self.assertTrue(first)
+        self.assertEqual(self.seed(), first)
+        self.assertNotEqual(self.seed(seed=1), first)
+
+    def test_totals_match_sales(self):
+        self.seed()
+        user = User.objects.get(username='seed_user_0')
+        total = YearTotal.objects.get(user=user, year=2022)
+        counts = StockCount.objects.filter(user=user)
+        self.assertEqual(total.photo,
+                         sum(counts.values_list('photo', flat=True)))
+        self.assertEqual(MonthTotal.objects.filter(user=user).count(), 24)
+
+
+class BenchmarkTest(TestCase):
+    def test_report(self):
+        call_command('seed_data', '--stocks', '2', stdout=StringIO())
+        out = StringIO()
+        call_command('benchmark', '--repeat', '2', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report), {'index', 'month', 'total', 'income',
+                                       'graphic_daily', 'graphic_monthly',
+                                       'graphic_diagram'})
+        for name, scenario in report.items():
+            with self.subTest(name=name):
+                self.assertEqual(scenario['repeat'], 2)
+                self.assertTrue(set(scenario['statuses']) <= {200, 302})
+                self.assertGreater(scenario['queries']['min'], 0)
+                self.assertLessEqual(scenario['latency_ms']['p50'],
+                                     scenario['latency_ms']['max'])
@@ -0,0 +1,120 @@
+import os
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from photos.cache import get_data_version
+from photos.checks import check_shared_cache
+from photos.models import Stock, StockCount, User, get_or_create_day
+from photos.rollups import rebuild_totals
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'photos-tests',
+    }
+}
+AGGREGATE_TABLES = ('photos_stockcount', 'photos_monthtotal')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ResultCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.year = 2022
+        cls.month_no = 7
+        cls.stock = Stock.objects.create(
+            user=cls.user, name='Pond5', pseudo_name='Pond5'
+        )
+        cls.day = get_or_create_day(user=cls.user, year=cls.year,
+                                    month=cls.month_no, date=3)
+        StockCount.objects.add(stock=cls.stock, day=cls.day,
+                               photo=1, video=1, income=1)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def get_aggregate_queries(self, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            if data is None:
+                self.authorized_client.get(url)
+            else:
+                self.authorized_client.post(url, data=data)
+        return [query['sql'] for query in queries.captured_queries
+                if any(table in query['sql'] for table in AGGREGATE_TABLES)]
+
+    def test_repeated_requests_skip_aggregates(self):
+        """Повторный запрос графика не выполняет агрегирующих запросов"""
+        urls = (
+            reverse('api_daily',
+                    args=(self.stock.name, self.year, self.month_no)),
+            reverse('api_monthly', args=(self.stock.name, self.year)),
+            reverse('api_diagram', args=(self.year, self.month_no)),
+            reverse('api_total', args=(self.year, self.month_no)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.get_aggregate_queries(url)
+                second = self.get_aggregate_queries(url)
+                self.assertTrue(first)
+                self.assertEqual(second, [])
+
+    def test_total_page_uses_cache(self):
+        data = {'year': self.year, 'month': self.month_no}
+        first = self.get_aggregate_queries(reverse('total'), data)
+        second = self.get_aggregate_queries(reverse('total'), data)
+        self.assertTrue(first)
+        self.assertEqual(second, [])
+
+    def test_write_invalidates_cache(self):
+        """Новые продажи сразу видны в закешированном графике"""
+        url = reverse('api_monthly', args=(self.stock.name, self.year))
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.json()['photo'][6], 1)
+        self.assertEqual(
+            self.authorized_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            ).status_code,
+            HTTPStatus.NOT_MODIFIED
+        )
+        StockCount.objects.add(stock=self.stock, day=self.day,
+                               photo=2, video=0, income=0)
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()['photo'][6], 3)
+
+    def test_rebuild_totals_invalidates_cache(self):
+        """Пересчет итогов сбрасывает закешированные графики"""
+        version = get_data_version(self.user.pk)
+        rebuild_totals(users=[self.user])
+        self.assertNotEqual(get_data_version(self.user.pk), version)
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    @override_settings(CACHES=LOCMEM_CACHE, DEBUG=False)
+    def test_local_cache_reported(self):
+        self.assertEqual([message.id for message in check_shared_cache(None)],
+                         ['photos.W001'])
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '4'}):
+            self.assertEqual(
+                [message.id for message in check_shared_cache(None)],
+                ['photos.E001']
+            )
+
+    def test_shared_cache_passes(self):
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'photos_cache',
+        }}):
+            self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from photos.models import (Stock, StockCount, User, get_or_create_day,
+                           set_uploads)
+
+
+class ConditionalMonthTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.year = 2022
+        cls.month_no = 7
+        set_uploads(user=cls.user, year=cls.year, month=cls.month_no,
+                    date=3, photo=2, video=1)
+        cls.url = reverse('months', kwargs={'year': cls.year,
+                                            'month': cls.month_no})
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        # первый ответ выдает CSRF-cookie, от которой зависит ETag
+        self.authorized_client.get(reverse('index'))
+
+    def test_not_modified(self):
+        """Неизмененный месяц отдается как 304 без запросов календаря"""
+        response = self.authorized_client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(3):  # сессия, пользователь и отметка
+            response = self.authorized_client.get(
+                self.url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_writes_change_validators(self):
+        """Загрузки и продажи за месяц меняют ETag"""
+        stock = Stock.objects.create(user=self.user, name='qwe',
+                                     pseudo_name='qwe')
+        day = get_or_create_day(user=self.user, year=self.year,
+                                month=self.month_no, date=3)
+        writes = (
+            lambda: set_uploads(user=self.user, year=self.year,
+                                month=self.month_no, date=3,
+                                photo=5, video=1),
+            lambda: StockCount.objects.add(stock=stock, day=day, photo=1),
+        )
+        for write in writes:
+            with self.subTest(write=write):
+                etag = self.authorized_client.get(self.url)['ETag']
+                write()
+                response = self.authorized_client.get(
+                    self.url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_empty_month(self):
+        url = reverse('months', kwargs={'year': self.year + 1,
+                                        'month': self.month_no})
+        etag = self.authorized_client.get(url)['ETag']
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
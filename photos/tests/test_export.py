@@ -0,0 +1,87 @@
+import csv
+import datetime as dt
+import io
+import zipfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from photos.models import Stock, StockCount, User, get_or_create_day
+
+
+class ExportSalesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        other = User.objects.create(username='Other')
+        cls.pond = Stock.objects.create(
+            user=cls.user, name='Pond5', pseudo_name='P5'
+        )
+        cls.adobe = Stock.objects.create(
+            user=cls.user, name='Adobe', pseudo_name='AS & Co'
+        )
+        foreign = Stock.objects.create(
+            user=other, name='Pond5', pseudo_name='P5'
+        )
+        for stock, date in ((cls.pond, 3), (cls.adobe, 3),
+                            (cls.pond, 20), (foreign, 3)):
+            day = get_or_create_day(user=stock.user, year=2022, month=7,
+                                    date=date)
+            StockCount.objects.add(stock=stock, day=day,
+                                   photo=date, video=1, income=0.5)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.authorized_client.get(reverse('export_report'),
+                                              {'format': 'csv', **params})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_csv_export(self):
+        self.assertEqual(self.export(), [
+            ['Дата', 'Сток', 'Фото', 'Видео', 'Доход'],
+            ['2022-07-03', 'AS & Co', '3', '1', '0.5'],
+            ['2022-07-03', 'P5', '3', '1', '0.5'],
+            ['2022-07-20', 'P5', '20', '1', '0.5'],
+        ])
+
+    def test_filters(self):
+        """Фильтры по датам и стоку ограничивают выгрузку"""
+        filters = {
+            'date_from': ({'date_from': '2022-07-04'}, 1),
+            'date_to': ({'date_to': '2022-07-03'}, 2),
+            'stock': ({'stock': 'Pond5'}, 2),
+            'all': ({'stock': 'Pond5', 'date_from': '2022-07-04',
+                     'date_to': '2022-07-31'}, 1),
+        }
+        for name, (params, expected) in filters.items():
+            with self.subTest(name=name):
+                self.assertEqual(len(self.export(**params)) - 1, expected)
+
+    def test_xlsx_export(self):
+        response = self.authorized_client.get(reverse('export_report'),
+                                              {'format': 'xlsx'})
+        book = zipfile.ZipFile(io.BytesIO(b''.join(
+            response.streaming_content
+        )))
+        self.assertIsNone(book.testzip())
+        sheet = book.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 4)
+        self.assertIn('<t>AS &amp; Co</t>', sheet)
+        self.assertIn('<c><v>20</v></c>', sheet)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_sales', '--user', 'Anon', '--from',
+                     str(dt.date(2022, 7, 10)), '--chunk-size', '1',
+                     stdout=out)
+        self.assertEqual(out.getvalue().splitlines(),
+                         ['Дата,Сток,Фото,Видео,Доход',
+                          '2022-07-20,P5,20,1,0.5'])
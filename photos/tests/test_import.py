@@ -0,0 +1,158 @@
+import datetime as dt
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from photos.importer import get_digests, parse_number
+from photos.models import (ImportedSale, ImportOccurrence, MonthTotal, Stock,
+                           StockCount, User, YearTotal)
+
+REPORT = '''Date,Stock,Photos,Videos,Earnings
+2022-07-01,Pond5,1,0,"2,50"
+2022-07-01,Pond5,1,1,1.5
+07/02/2022,pond5,0,2,$3
+2022-07-02,Unknown,1,0,1
+not a date,Pond5,1,0,1
+'''
+SHUTTERSTOCK_REPORT = '''Download date;Media type;Earnings
+2022-08-05 10:11:12;image;0.38
+2022-08-05 12:00:00;video;12.1
+2022-08-06 00:00:01;image;0.38
+'''
+
+
+class ImportSalesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.pond = Stock.objects.create(
+            user=cls.user, name='Pond5', pseudo_name='Pond5'
+        )
+        cls.shutter = Stock.objects.create(
+            user=cls.user, name='Shutter', pseudo_name='SS'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def call_import(self, report, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv',
+                                         delete=False) as report_file:
+            report_file.write(report)
+        self.addCleanup(os.remove, report_file.name)
+        out = StringIO()
+        call_command('import_sales', report_file.name, '--user', 'Anon',
+                     '--chunk-size', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def get_counts(self):
+        return list(StockCount.objects.order_by('stock', 'date').values_list(
+            'stock__name', 'date', 'photo', 'video', 'income'
+        ))
+
+    def test_command_imports_and_skips_duplicates(self):
+        """Повторная загрузка отчета не удваивает продажи"""
+        out = self.call_import(REPORT)
+        self.assertIn('строк: 2, загружено: 2', out)
+        self.assertIn('строк: 5, загружено: 3, повторов: 0, отклонено: 2',
+                      out)
+        expected = [('Pond5', dt.date(2022, 7, 1), 2, 1, 4.0),
+                    ('Pond5', dt.date(2022, 7, 2), 0, 2, 3.0)]
+        self.assertEqual(self.get_counts(), expected)
+        out = self.call_import(REPORT)
+        self.assertIn('загружено: 0, повторов: 3', out)
+        self.assertEqual(self.get_counts(), expected)
+        month_total = MonthTotal.objects.get(stock=self.pond)
+        year_total = YearTotal.objects.get(user=self.user)
+        for total in (month_total, year_total):
+            with self.subTest(total=total):
+                self.assertEqual((total.photo, total.video, total.income),
+                                 (2, 3, 7.0))
+
+    def test_longer_report_imports_only_new_rows(self):
+        """Строки, сдвинутые в новом отчете, не загружаются повторно"""
+        self.call_import(REPORT)
+        header, *lines = REPORT.splitlines()
+        longer = '\n'.join([header, '2022-07-03,Pond5,1,0,1',
+                            *reversed(lines), '2022-07-01,Pond5,1,1,1.5'])
+        out = self.call_import(longer)
+        self.assertIn('загружено: 2, повторов: 3', out)
+        self.assertEqual(self.get_counts(),
+                         [('Pond5', dt.date(2022, 7, 1), 3, 2, 5.5),
+                          ('Pond5', dt.date(2022, 7, 2), 0, 2, 3.0),
+                          ('Pond5', dt.date(2022, 7, 3), 1, 0, 1.0)])
+
+    def test_occurrences_removed_after_import(self):
+        """Счетчики повторов не переживают импорт"""
+        self.call_import(REPORT + '2022-07-01,Pond5,1,1,1.5\n')
+        self.assertEqual(StockCount.objects.get(date='2022-07-01').photo, 3)
+        self.assertFalse(ImportOccurrence.objects.exists())
+
+    def test_concurrent_import_of_same_report(self):
+        """Строки, записанные одновременным импортом, не удваиваются"""
+        def get_digests_raced(run, rows):
+            digests = get_digests(run, rows)
+            # другой импорт того же отчета успел записать эти строки
+            ImportedSale.objects.bulk_create(
+                [ImportedSale(user=self.user, digest=digest, run='other')
+                 for digest in digests]
+            )
+            return digests
+
+        with mock.patch('photos.importer.get_digests', get_digests_raced):
+            out = self.call_import(REPORT)
+        self.assertIn('загружено: 0, повторов: 3, отклонено: 2', out)
+        self.assertFalse(StockCount.objects.exists())
+
+    def test_blank_stock_rejected(self):
+        """Строка с пустым стоком отклоняется, а не роняет импорт"""
+        out = self.call_import('Date,Stock,Earnings\n2022-03-01,,0.25\n'
+                               '2022-03-01,Pond5,0.25\n')
+        self.assertIn('загружено: 1, повторов: 0, отклонено: 1', out)
+
+    def test_command_counts_media_rows(self):
+        """Отчет без колонок фото и видео считается по типу файла"""
+        self.call_import(SHUTTERSTOCK_REPORT, '--stock', 'SS')
+        self.assertEqual(self.get_counts(),
+                         [('Shutter', dt.date(2022, 8, 5), 1, 1, 12.48),
+                          ('Shutter', dt.date(2022, 8, 6), 1, 0, 0.38)])
+
+    def test_upload_view(self):
+        report = SimpleUploadedFile('report.csv', REPORT.encode('utf-8-sig'))
+        response = self.authorized_client.post(reverse('import_report'),
+                                               {'file': report})
+        self.assertEqual(response.context['stats'].imported, 3)
+        self.assertEqual(len(self.get_counts()), 2)
+
+    def test_upload_view_requires_stock(self):
+        report = SimpleUploadedFile('report.csv',
+                                    SHUTTERSTOCK_REPORT.encode())
+        response = self.authorized_client.post(reverse('import_report'),
+                                               {'file': report})
+        self.assertIn('file', response.context['form'].errors)
+        self.assertFalse(StockCount.objects.exists())
+
+
+class ParseNumberTest(SimpleTestCase):
+    def test_separators(self):
+        for value, expected in (('', 0), ('3', 3), ('$3', 3),
+                                ('2,50', 2.5), ('1.5', 1.5),
+                                ('1,234.56', 1234.56), ('1.234,56', 1234.56),
+                                ('1 234,5', 1234.5), ('1,234,567', 1234567),
+                                ('-0.38', -0.38)):
+            with self.subTest(value=value):
+                self.assertEqual(parse_number(value), expected)
+
+    def test_ambiguous_rejected(self):
+        for value in ('1,234,56', '1.234.5', '12,34.5', 'abc', '1..2'):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_number(value)
@@ -0,0 +1,89 @@
+import datetime as dt
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from photos.models import MonthTotal, Stock, StockCount, User
+
+
+class IncomeAllTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.stocks = [Stock.objects.create(user=cls.user,
+                                           name=f'stock{number}',
+                                           pseudo_name=f'S{number}')
+                      for number in range(8)]
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def post_rows(self, date, rows, stocks=None):
+        stocks = stocks or self.stocks
+        data = {'date': date,
+                'form-TOTAL_FORMS': len(stocks),
+                'form-INITIAL_FORMS': len(stocks)}
+        for index, stock in enumerate(stocks):
+            data[f'form-{index}-stock'] = stock.pk
+        for index, values in rows.items():
+            for field, value in zip(('photo', 'video', 'income'), values):
+                data[f'form-{index}-{field}'] = value
+        return self.authorized_client.post(reverse('income_all'), data)
+
+    def test_form_has_row_per_stock(self):
+        response = self.authorized_client.get(reverse('income_all'))
+        self.assertEqual([stock for stock, _ in response.context['rows']],
+                         self.stocks)
+
+    def test_writes_all_stocks(self):
+        response = self.post_rows('2022-07-03', {0: (1, 0, 2.5),
+                                                 3: (0, 2, 10),
+                                                 5: (0, 0, 0)})
+        self.assertRedirects(response, reverse('index'))
+        self.post_rows('2022-07-03', {0: (1, 1, 1)})
+        counts = StockCount.objects.order_by('stock').values_list(
+            'stock', 'date', 'photo', 'video', 'income'
+        )
+        self.assertEqual(list(counts),
+                         [(self.stocks[0].pk, dt.date(2022, 7, 3), 2, 1, 3.5),
+                          (self.stocks[3].pk, dt.date(2022, 7, 3), 0, 2, 10)])
+        self.assertEqual(MonthTotal.objects.count(), 2)
+
+    def test_rows_keep_their_stock(self):
+        """Строка пишется в свой сток, даже если список стоков изменился"""
+        stocks = self.stocks[::-1]
+        response = self.post_rows('2022-07-03', {0: (1, 0, 2)}, stocks)
+        self.assertRedirects(response, reverse('index'))
+        self.assertEqual(
+            list(StockCount.objects.values_list('stock', 'photo')),
+            [(self.stocks[-1].pk, 1)]
+        )
+
+    def test_unknown_stock_rejected(self):
+        """Удаленный или чужой сток не принимается, ничего не пишется"""
+        other = Stock.objects.create(user=User.objects.create(username='X'),
+                                     name='other', pseudo_name='other')
+        for stocks in ([*self.stocks[:-1], other],
+                       [*self.stocks[:-1], self.stocks[0]]):
+            with self.subTest(stocks=stocks[-1]):
+                response = self.post_rows('2022-07-03', {7: (1, 0, 2)},
+                                          stocks)
+                self.assertEqual(response.status_code, 200)
+        self.assertFalse(StockCount.objects.exists())
+
+    def test_query_count_does_not_grow(self):
+        """Число запросов не зависит от количества стоков"""
+        # итог года создается первой записью, дальше он только растет
+        self.post_rows('2022-07-01', {0: (1, 0, 1)})
+        queries = []
+        for date, rows in (('2022-08-01', {0: (1, 0, 1)}),
+                           ('2022-09-01', {index: (1, 1, 1)
+                                           for index in range(8)})):
+            with CaptureQueriesContext(connection) as captured:
+                self.post_rows(date, rows)
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
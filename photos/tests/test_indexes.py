@@ -0,0 +1,109 @@
+import datetime as dt
+import re
+from functools import partial
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from photos.aggregates import (month_graphic, month_totals, year_graphic,
+                               year_total)
+from photos.models import Day, Month, Stock, StockCount, User
+
+FULL_SCAN = re.compile(r'\bSCAN photos_\w+\b(?! USING)')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN для SQLite')
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.year = 2022
+        cls.month_no = 7
+        cls.stock = Stock.objects.create(
+            user=cls.user, name='qwe', pseudo_name='qwe'
+        )
+        cls.month = Month.objects.create(
+            user=cls.user, month_list=cls.month_no, year_list=cls.year
+        )
+        cls.days = [Day.objects.create(date=date, month=cls.month,
+                                       photo=0, video=0)
+                    for date in range(1, 4)]
+        for day in cls.days:
+            StockCount.objects.create(stock=cls.stock, day=day,
+                                      photo=1, video=1, income=1)
+
+    def assert_uses_indexes(self, queryset, *indexes):
+        plan = queryset.explain()
+        self.assertIsNone(FULL_SCAN.search(plan), msg=plan)
+        for index in indexes:
+            self.assertIn(index, plan)
+
+    def test_month_lookup(self):
+        """Месяц ищется по составному индексу"""
+        self.assert_uses_indexes(
+            Month.objects.filter(user=self.user,
+                                 month_list=self.month_no,
+                                 year_list=self.year),
+            'INDEX',
+        )
+        self.assert_uses_indexes(
+            Month.objects.filter(user=self.user, year_list=self.year)
+                         .order_by('month_list'),
+            'month_user_year_idx',
+        )
+
+    def test_days_lookup(self):
+        """Дни месяца читаются из покрывающего индекса"""
+        self.assert_uses_indexes(
+            Day.objects.filter(month=self.month, date__gt=0),
+            'COVERING INDEX day_month_cover_idx',
+        )
+
+    def test_counts_lookup(self):
+        """Продажи стока за период читаются из покрывающего индекса"""
+        self.assert_uses_indexes(
+            StockCount.objects.filter(stock=self.stock, day__in=self.days),
+            'INDEX',
+        )
+        self.assert_uses_indexes(
+            StockCount.objects
+            .filter(stock=self.stock,
+                    date__range=(dt.date(2022, 7, 1), dt.date(2022, 7, 31)))
+            .values('date', 'photo', 'video', 'income'),
+            'COVERING INDEX count_stock_date_cover_idx',
+        )
+
+    def test_user_range_lookup(self):
+        """Продажи пользователя за период ищутся без соединений"""
+        plan = (StockCount.objects
+                .filter(user=self.user, date__gte=dt.date(2022, 5, 1))
+                .explain())
+        self.assertIn('count_user_date_idx', plan)
+        self.assertNotIn('photos_day', plan)
+
+    def test_aggregates(self):
+        """Запросы графиков и итогов обходятся без полного сканирования"""
+        calls = {
+            'month_graphic': partial(month_graphic, year=self.year,
+                                     month=self.month_no, stock=self.stock),
+            'year_graphic': partial(year_graphic, year=self.year,
+                                    stock=self.stock),
+            'month_totals': partial(month_totals, user=self.user,
+                                    year=self.year, month=self.month_no),
+            'year_total': partial(year_total, user=self.user,
+                                  year=self.year),
+        }
+        for name, call in calls.items():
+            with CaptureQueriesContext(connection) as captured:
+                call()
+            self.assertTrue(captured.captured_queries)
+            for query in captured.captured_queries:
+                with self.subTest(name=name, sql=query['sql']):
+                    with connection.cursor() as cursor:
+                        cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                        rows = cursor.fetchall()
+                    plan = '\n'.join(str(row[-1]) for row in rows)
+                    self.assertIsNone(FULL_SCAN.search(plan), msg=plan)
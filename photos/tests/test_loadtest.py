@@ -0,0 +1,60 @@
+import json
+from collections import Counter
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from photos.loadtest import check_writes, is_expected, parse_mix
+from photos.models import StockCount
+
+
+class CheckWritesTest(SimpleTestCase):
+    def test_lost_and_duplicated(self):
+        before = {('u', 's', 'd1'): 5}
+        after = {('u', 's', 'd1'): 6, ('u', 's', 'd2'): 3}
+        confirmed = Counter({('u', 's', 'd1'): 2, ('u', 's', 'd2'): 1})
+        failed = Counter({('u', 's', 'd2'): 1})
+        self.assertEqual(check_writes(before, after, confirmed, failed),
+                         {'writes_confirmed': 3, 'writes_failed': 1,
+                          'lost': 1, 'duplicated': 1})
+
+    def test_redirect_to_login_is_not_a_write(self):
+        """302 на страницу входа после истекшей сессии - не запись"""
+        self.assertTrue(is_expected('income', 302, '/'))
+        self.assertTrue(is_expected('income', 302, 'http://testserver/'))
+        self.assertFalse(is_expected('income', 302,
+                                     '/auth/login/?next=/income/'))
+        self.assertFalse(is_expected('income', 200, None))
+        self.assertTrue(is_expected('month', 200, None))
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('month=1,income=3'),
+                         {'month': 1, 'income': 3})
+        with self.assertRaises(ValueError):
+            parse_mix('admin=1')
+
+
+class LoadTest(LiveServerTestCase):
+    def test_report(self):
+        call_command('seed_data', '--users', '2', '--stocks', '2',
+                     '--sale-chance', '0', stdout=StringIO())
+        out = StringIO()
+        # сервер тестов делит одно соединение с SQLite в памяти,
+        # поэтому запросы идут по одному
+        call_command('load_test', '--url', self.live_server_url,
+                     '--users', '2', '--requests', '30', '--workers', '1',
+                     '--mix', 'month=1,income=2,graphic=1', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['requests'], 30)
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(set(report['actions']),
+                         {'month', 'income', 'graphic'})
+        consistency = report['consistency']
+        self.assertEqual(consistency['lost'], 0)
+        self.assertEqual(consistency['duplicated'], 0)
+        self.assertEqual(consistency['duplicate_rows'], 0)
+        self.assertEqual(
+            sum(StockCount.objects.values_list('photo', flat=True)),
+            consistency['writes_confirmed']
+        )
@@ -0,0 +1,67 @@
+import logging
+import os
+import tempfile
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from counter.log import KeyValueFormatter, QueueFileHandler, log_event
+from photos.models import User, set_uploads
+
+
+class QueueLoggingTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, 'photos.log')
+        self.handler = QueueFileHandler(self.filename, max_bytes=200,
+                                        backup_count=2)
+        self.handler.setFormatter(KeyValueFormatter('%(message)s'))
+        self.logger = logging.getLogger('photos.tests.queue')
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def read_log(self):
+        self.handler.close()
+        with open(self.filename, encoding='utf-8') as log_file:
+            return log_file.read().splitlines()
+
+    def test_structured_event(self):
+        """Событие пишется строкой ключ=значение из потока очереди"""
+        log_event(self.logger, 'sales_added', user=1, stock='Pond 5',
+                  note='', income=2.5)
+        self.assertEqual(self.read_log(),
+                         ['sales_added user=1 stock="Pond 5" note="" '
+                          'income=2.5'])
+
+    def test_rotation(self):
+        for number in range(20):
+            log_event(self.logger, 'event', number=number)
+        self.read_log()
+        self.assertTrue(os.path.exists(f'{self.filename}.1'))
+
+    def test_disabled_level_is_skipped(self):
+        class Probe:
+            def __str__(self):
+                raise AssertionError('значение не должно форматироваться')
+
+        log_event(self.logger, 'debug_event', level=logging.DEBUG,
+                  probe=Probe())
+        self.assertFalse(os.path.exists(self.filename) and self.read_log())
+
+
+class MonthLogTest(TestCase):
+    def test_month_log_runs_no_queries(self):
+        """Запись в журнал страницы месяца не читает базу"""
+        user = User.objects.create(username='Anon')
+        set_uploads(user=user, year=2022, month=7, date=3, photo=1, video=1)
+        client = Client()
+        client.force_login(user)
+        with self.assertLogs('photos.views', logging.INFO) as logs:
+            with self.assertNumQueries(4):  # сессия, пользователь, месяц, дни
+                client.get(reverse('months', args=(2022, 7)))
+        self.assertEqual(logs.records[0].fields,
+                         {'user': user.pk, 'year': 2022, 'month': 7,
+                          'saved_days': 1})
@@ -0,0 +1,63 @@
+import re
+from http import HTTPStatus
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from photos.metrics import metrics
+from photos.models import User
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.staff = User.objects.create(username='Staff', is_staff=True)
+
+    def setUp(self):
+        metrics.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def get_metric(self, text, name, view):
+        match = re.search(rf'^{name}{{view="{view}"}} (\S+)$', text, re.M)
+        return float(match.group(1))
+
+    def test_access(self):
+        """Метрики видит только персонал или сборщик с токеном"""
+        self.assertEqual(self.staff_client.get('/metrics').status_code,
+                         HTTPStatus.OK)
+        self.assertEqual(self.authorized_client.get('/metrics').status_code,
+                         HTTPStatus.FORBIDDEN)
+        self.assertEqual(Client().get('/metrics').status_code,
+                         HTTPStatus.FOUND)
+        with override_settings(METRICS_TOKEN='secret'):
+            response = Client().get('/metrics',
+                                    HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            response = Client().get('/metrics',
+                                    HTTP_AUTHORIZATION='Bearer wrong')
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_views_are_measured(self):
+        for _ in range(2):
+            self.authorized_client.get(reverse('months', args=(2022, 7)))
+        self.authorized_client.get('/missing/page/')
+        text = self.staff_client.get('/metrics').content.decode()
+        self.assertEqual(self.get_metric(
+            text, 'photos_view_latency_seconds_count', 'months'
+        ), 2)
+        # сессия, пользователь, месяц на каждый запрос
+        self.assertEqual(self.get_metric(
+            text, 'photos_view_db_queries_total', 'months'
+        ), 6)
+        self.assertGreater(self.get_metric(
+            text, 'photos_view_db_seconds_total', 'months'
+        ), 0)
+        self.assertIn('photos_view_latency_seconds_bucket'
+                      '{view="months",le="+Inf"} 2', text)
+        self.assertIn('photos_view_requests_total'
+                      '{view="unresolved",status="4xx"} 1', text)
@@ -1,6 +1,14 @@
+import datetime as dt
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
-from photos.models import Day, Month, Stock, User
+from photos import models
+from photos.models import (Day, Month, MonthTotal, Stock, StockCount, User,
+                           YearTotal, set_uploads)
 
 
 class ModelsTest(TestCase):
@@ -17,7 +25,9 @@ class ModelsTest(TestCase):
         cls.stock = Stock.objects.create(
             user=cls.user, name='qwe', pseudo_name='qwe'
         )
-        cls.stock.day.set([cls.day, ])
+        cls.stock.day.set([cls.day, ],
+                          through_defaults={'user': cls.user,
+                                            'date': cls.day.full_date})
 
     def test_month_verbose_names(self):
         """verbose_name в полях Month совпадает с ожидаемым."""
@@ -65,3 +75,173 @@ class ModelsTest(TestCase):
 
                 self.assertEqual(
                     stock._meta.get_field(value).verbose_name, expected)
+
+
+class StockCountAddTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.month = Month.objects.create(
+            user=cls.user, month_list=7, year_list=2022
+        )
+        cls.day = Day.objects.create(
+            date=15, month=cls.month, photo=0, video=0
+        )
+        cls.stock = Stock.objects.create(
+            user=cls.user, name='qwe', pseudo_name='qwe'
+        )
+
+    def test_add_creates_and_increments(self):
+        """add создает запись и прибавляет к ней продажи и итогам"""
+        StockCount.objects.add(stock=self.stock, day=self.day,
+                               photo=1, video=2, income=3.5)
+        # UPDATE продаж, итогов месяца и года и отметки месяца
+        # в точке сохранения
+        with self.assertNumQueries(6):
+            StockCount.objects.add(stock=self.stock, day=self.day,
+                                   photo=1, video=None, income=1)
+        count = StockCount.objects.get(stock=self.stock, day=self.day)
+        self.assertEqual((count.photo, count.video, count.income),
+                         (2, 2, 4.5))
+        self.assertEqual(count.date, dt.date(2022, 7, 15))
+        self.assertEqual(count.user, self.user)
+        month_total = MonthTotal.objects.get(stock=self.stock)
+        year_total = YearTotal.objects.get(user=self.user)
+        for total in (month_total, year_total):
+            with self.subTest(total=total):
+                self.assertEqual((total.photo, total.video, total.income),
+                                 (2, 2, 4.5))
+
+    def test_add_many_matches_add(self):
+        """Пакетная запись дает те же продажи и итоги, что и add"""
+        StockCount.objects.add(stock=self.stock, day=self.day,
+                               photo=1, video=2, income=3.5)
+        sales = {(self.stock.pk, dt.date(2022, 7, 15)): (1, 0, 1.5),
+                 (self.stock.pk, dt.date(2022, 8, 1)): (2, 1, 1)}
+        StockCount.objects.add_many(self.user, sales)
+        counts = StockCount.objects.order_by('date').values_list(
+            'date', 'user', 'photo', 'video', 'income'
+        )
+        self.assertEqual(list(counts),
+                         [(dt.date(2022, 7, 15), self.user.pk, 2, 2, 5.0),
+                          (dt.date(2022, 8, 1), self.user.pk, 2, 1, 1.0)])
+        expected = self.get_totals()
+        call_command('rebuild_totals', stdout=StringIO())
+        self.assertEqual(self.get_totals(), expected)
+
+    def test_add_many_survives_concurrent_insert(self):
+        """Строка, вставленная параллельно после блокировки,
+        увеличивается, а не вызывает IntegrityError"""
+        lock_rows = models.lock_rows
+        inserted = []
+
+        def insert_between(model, fields, keys):
+            rows = lock_rows(model, fields, keys)
+            if model is StockCount and not inserted:
+                inserted.append(True)
+                StockCount.objects.add(stock=self.stock, day=self.day,
+                                       photo=2, video=0, income=1)
+                return {}
+            return rows
+
+        with mock.patch('photos.models.lock_rows', insert_between):
+            StockCount.objects.add_many(
+                self.user, {(self.stock.pk, self.day.full_date): (1, 1, 1)}
+            )
+        count = StockCount.objects.get(stock=self.stock, day=self.day)
+        self.assertEqual((count.photo, count.video, count.income),
+                         (3, 1, 2.0))
+        self.assertEqual(
+            MonthTotal.objects.get(stock=self.stock).photo, 3
+        )
+
+    def test_add_many_query_count_does_not_grow(self):
+        small = {(self.stock.pk, dt.date(2022, 9, 1)): (1, 1, 1)}
+        large = {(self.stock.pk, dt.date(2022, 10, date)): (1, 1, 1)
+                 for date in range(1, 29)}
+        # итог года создается первой пачкой
+        StockCount.objects.add_many(
+            self.user, {(self.stock.pk, dt.date(2022, 8, 1)): (1, 1, 1)}
+        )
+        # месяц и дни: поиск и вставка; продажи и итоги месяца:
+        # блокировка, вставка недостающих, повторная блокировка,
+        # обновление; итог года; отметка месяца
+        with self.assertNumQueries(19) as small_queries:
+            StockCount.objects.add_many(self.user, small)
+        with self.assertNumQueries(len(small_queries)):
+            StockCount.objects.add_many(self.user, large)
+
+    def test_set_uploads_moves_difference_to_year_total(self):
+        set_uploads(user=self.user, year=2022, month=7, date=15,
+                    photo=4, video=1)
+        set_uploads(user=self.user, year=2022, month=7, date=15,
+                    photo=2, video=3)
+        set_uploads(user=self.user, year=2022, month=8, date=1,
+                    photo=1, video=0)
+        year_total = YearTotal.objects.get(user=self.user, year=2022)
+        self.assertEqual((year_total.upload_photo, year_total.upload_video),
+                         (3, 3))
+
+    def test_rebuild_totals(self):
+        """Пересчет итогов совпадает с инкрементальными итогами"""
+        StockCount.objects.add(stock=self.stock, day=self.day,
+                               photo=1, video=2, income=3.5)
+        set_uploads(user=self.user, year=2022, month=7, date=15,
+                    photo=4, video=1)
+        expected = self.get_totals()
+        MonthTotal.objects.update(photo=100)
+        YearTotal.objects.all().delete()
+        call_command('rebuild_totals', stdout=StringIO())
+        self.assertEqual(self.get_totals(), expected)
+
+    def test_stock_delete_updates_year_total(self):
+        """Удаление стока убирает его продажи из итога года"""
+        removed = Stock.objects.create(user=self.user, name='asd',
+                                       pseudo_name='asd')
+        StockCount.objects.add(stock=removed, day=self.day,
+                               photo=1, video=2, income=3.5)
+        StockCount.objects.add(stock=self.stock, day=self.day,
+                               photo=4, video=0, income=1)
+        set_uploads(user=self.user, year=2022, month=7, date=15,
+                    photo=4, video=1)
+        removed.delete()
+        expected = self.get_totals()
+        self.assertEqual(expected[1],
+                         [(self.user.pk, 2022, 4, 0, 1.0, 4, 1)])
+        call_command('rebuild_totals', stdout=StringIO())
+        self.assertEqual(self.get_totals(), expected)
+
+    def get_totals(self):
+        month_totals = MonthTotal.objects.values_list(
+            'stock', 'year', 'month', 'photo', 'video', 'income'
+        )
+        year_totals = YearTotal.objects.values_list(
+            'user', 'year', 'photo', 'video', 'income',
+            'upload_photo', 'upload_video'
+        )
+        return list(month_totals), list(year_totals)
+
+    def test_add_fills_empty_values(self):
+        StockCount.objects.create(stock=self.stock, day=self.day)
+        StockCount.objects.add(stock=self.stock, day=self.day,
+                               photo=1, video=1, income=1)
+        count = StockCount.objects.get(stock=self.stock, day=self.day)
+        self.assertEqual((count.photo, count.video, count.income),
+                         (1, 1, 1.0))
+
+    def test_unique_constraints(self):
+        """Дубли месяца, дня и продаж за день запрещены"""
+        StockCount.objects.create(stock=self.stock, day=self.day)
+        duplicates = (
+            lambda: Month.objects.create(user=self.user, month_list=7,
+                                         year_list=2022),
+            lambda: Day.objects.create(date=15, month=self.month),
+            lambda: StockCount.objects.create(stock=self.stock,
+                                              day=self.day),
+        )
+        for create in duplicates:
+            with self.subTest(create=create):
+                with self.assertRaises(IntegrityError):
+                    with transaction.atomic():
+                        create()
@@ -0,0 +1,71 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from photos.models import Day, User, YearTotal, set_uploads
+
+
+class MonthEditTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.year = 2022
+        cls.month_no = 7
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        set_uploads(user=self.user, year=self.year, month=self.month_no,
+                    date=2, photo=4, video=1)
+        self.url = reverse('month_edit', args=(self.year, self.month_no))
+
+    def post_cells(self, cells):
+        data = {'form-TOTAL_FORMS': 31, 'form-INITIAL_FORMS': 31}
+        for date, values in cells.items():
+            for field, value in values.items():
+                data[f'form-{date - 1}-{field}'] = value
+        return self.authorized_client.post(self.url, data)
+
+    def get_uploads(self):
+        return dict(Day.objects.filter(month__user=self.user)
+                    .values_list('date', 'photo'))
+
+    def test_grid_shows_every_day(self):
+        response = self.authorized_client.get(self.url)
+        formset = response.context['formset']
+        self.assertEqual(len(formset.forms), 31)
+        self.assertEqual(formset.forms[1].initial, {'photo': 4, 'video': 1})
+
+    def test_saves_only_dirty_cells(self):
+        """Сохраняются только присланные и измененные ячейки"""
+        response = self.post_cells({1: {'photo': 3},
+                                    2: {'photo': 4, 'video': 1},
+                                    5: {'photo': 0, 'video': 2}})
+        self.assertRedirects(response, reverse('months',
+                                               args=(self.year,
+                                                     self.month_no)))
+        self.assertEqual(self.get_uploads(), {1: 3, 2: 4, 5: 0})
+        self.assertEqual(Day.objects.get(date=5).video, 2)
+        year_total = YearTotal.objects.get(user=self.user, year=self.year)
+        self.assertEqual((year_total.upload_photo, year_total.upload_video),
+                         (7, 3))
+
+    def test_save_query_count_does_not_grow(self):
+        """Число запросов не зависит от количества измененных дней"""
+        queries = []
+        for cells in ({4: {'photo': 1}},
+                      {date: {'photo': 1, 'video': 1}
+                       for date in range(6, 31)}):
+            with CaptureQueriesContext(connection) as captured:
+                self.post_cells(cells)
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(Day.objects.filter(photo=1).count(), 26)
+
+    def test_invalid_cell_is_rejected(self):
+        response = self.post_cells({1: {'photo': 100}})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].errors[0])
+        self.assertEqual(self.get_uploads(), {2: 4})
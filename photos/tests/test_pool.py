@@ -0,0 +1,132 @@
+import os
+import tempfile
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from counter.db.pool import ConnectionPool, PoolTimeoutError, get_pools, pools
+from photos.metrics import render_pools
+
+
+class FakeConnection:
+    def __init__(self):
+        self.broken = False
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def check(connection):
+    if connection.broken:
+        raise OSError('Соединение разорвано')
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def make_pool(self, **kwargs):
+        return ConnectionPool(FakeConnection, check, **kwargs)
+
+    def test_reuses_connections(self):
+        pool = self.make_pool(min_size=2, max_size=2)
+        first = pool.get()
+        self.assertEqual((pool.size, pool.in_use), (2, 1))
+        pool.put(first)
+        self.assertIs(pool.get(), first)
+        self.assertEqual(pool.stats.created, 2)
+
+    def test_waits_then_times_out(self):
+        pool = self.make_pool(min_size=0, max_size=1, timeout=0.05)
+        connection = pool.get()
+        with self.assertRaises(PoolTimeoutError):
+            pool.get()
+        self.assertEqual((pool.stats.waits, pool.stats.timeouts), (1, 1))
+        threading.Timer(0.01, pool.put, (connection,)).start()
+        pool.timeout = 5
+        self.assertIs(pool.get(), connection)
+        self.assertEqual(pool.stats.waits, 2)
+
+    def test_broken_connection_replaced(self):
+        pool = self.make_pool(min_size=1, max_size=1, check_interval=0)
+        connection = pool.get()
+        connection.broken = True
+        pool.put(connection)
+        fresh = pool.get()
+        self.assertIsNot(fresh, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual((pool.size, pool.stats.discarded), (1, 1))
+
+
+class PooledSQLiteTest(SimpleTestCase):
+    """Бэкенд с пулом на файле SQLite вместо PostgreSQL."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings = {
+            'ENGINE': 'counter.db.sqlite3',
+            'NAME': os.path.join(directory.name, 'pool.sqlite3'),
+            'POOL': {'MIN_SIZE': 1, 'MAX_SIZE': 2, 'TIMEOUT': 1},
+        }
+        self.handler = self.make_handler(self.settings)
+        self.wrapper = self.handler['pooled']
+        self.addCleanup(self.close_pool)
+
+    def make_handler(self, settings):
+        return ConnectionHandler({
+            'default': {'ENGINE': 'django.db.backends.sqlite3'},
+            'pooled': settings,
+        })
+
+    def close_pool(self):
+        self.wrapper.close()
+        pool = pools.pop((os.getpid(), 'pooled'), None)
+        if pool is not None:
+            pool.close()
+
+    def test_connection_returns_to_pool(self):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer)')
+        raw = self.wrapper.connection
+        self.wrapper.close()
+        pool = get_pools()['pooled']
+        self.assertEqual((len(pool.idle), pool.in_use), (1, 0))
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM item')
+            self.assertEqual(cursor.fetchone(), (0,))
+        self.assertIs(self.wrapper.connection, raw)
+        self.assertEqual(pool.stats.created, 1)
+        self.assertIn('photos_db_pool_connections{alias="pooled",'
+                      'state="in_use"} 1', render_pools())
+
+    def test_requests_return_connections(self):
+        """Запросов больше, чем мест в пуле: места возвращаются"""
+        for _ in range(5):
+            with self.wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            # так соединение закрывает Django в конце запроса
+            self.wrapper.close()
+        pool = get_pools()['pooled']
+        self.assertEqual((pool.in_use, pool.stats.created), (0, 1))
+
+    def test_abandoned_connections_reclaimed(self):
+        """Поток, завершившийся без close, не занимает место навсегда"""
+        results = []
+
+        def request():
+            with self.handler['pooled'].cursor() as cursor:
+                cursor.execute('SELECT 1')
+                results.append(cursor.fetchone())
+
+        for _ in range(5):
+            thread = threading.Thread(target=request)
+            thread.start()
+            thread.join()
+        self.assertEqual(results, [(1,)] * 5)
+        self.assertLessEqual(get_pools()['pooled'].size, 2)
+
+    def test_persistent_connections_rejected(self):
+        handler = self.make_handler({**self.settings, 'CONN_MAX_AGE': 60})
+        with self.assertRaises(ImproperlyConfigured):
+            handler['pooled']
@@ -0,0 +1,108 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from photos.models import set_uploads
+from photos.seeding import seed
+
+YEAR = 2022
+MONTH = 7
+STOCK = 'stock0'
+SCALES = {'small': 2, 'large': 20}  # стоков у пользователя
+# Наибольшее число запросов на один запрос к странице, по имени адреса.
+# Сессия и пользователь входят в каждый бюджет.
+BUDGETS = {
+    'index': 3,
+    'months': 4,
+    'month_edit': 4,
+    'input': 2,
+    'income': 26,
+    'income_all': 3,
+    'import_report': 3,
+    'export_report': 4,
+    'create_stock': 2,
+    'graphic': 3,
+    'total': 3,
+    'metrics': 2,
+    'api_daily': 4,
+    'api_monthly': 4,
+    'api_diagram': 3,
+    'api_total': 3,
+    'api_day': 13,
+}
+REQUESTS = {
+    'index': ('get', (), None),
+    'months': ('get', (YEAR, MONTH), None),
+    'month_edit': ('get', (YEAR, MONTH), None),
+    'input': ('get', (YEAR, MONTH, 3), None),
+    'income': ('post', (), {'date': f'{YEAR + 1}-{MONTH:02}-03',
+                            'stock': STOCK,
+                            'photo': 1, 'video': 0, 'income': 1}),
+    'income_all': ('get', (), None),
+    'import_report': ('get', (), None),
+    'export_report': ('get', (), {'format': 'csv',
+                                  'date_from': f'{YEAR}-{MONTH:02}-01',
+                                  'date_to': f'{YEAR}-{MONTH:02}-31'}),
+    'create_stock': ('get', (), None),
+    'graphic': ('post', (), {'year': YEAR, 'month': MONTH,
+                             'graphic': 'daily', 'stock': STOCK}),
+    'total': ('post', (), {'year': YEAR, 'month': MONTH}),
+    'metrics': ('get', (), None),
+    'api_daily': ('get', (STOCK, YEAR, MONTH), None),
+    'api_monthly': ('get', (STOCK, YEAR), None),
+    'api_diagram': ('get', (YEAR, MONTH), None),
+    'api_total': ('get', (YEAR, MONTH), None),
+    'api_day': ('patch', (YEAR, MONTH, 3), '{"photo": 4}'),
+}
+
+
+class QueryBudgetTest(TestCase):
+    """Число запросов страницы ограничено и не растет с объемом данных"""
+
+    def measure(self, stocks):
+        user = seed(users=1, stocks=stocks, years=1, start_year=YEAR)[0]
+        user.is_staff = True
+        user.save(update_fields=['is_staff'])
+        client = Client()
+        client.force_login(user)
+        captured = {}
+        for name, (method, args, data) in REQUESTS.items():
+            url = reverse(name, args=args)
+            with CaptureQueriesContext(connection) as queries:
+                if method == 'patch':
+                    response = client.patch(url, data,
+                                            content_type='application/json')
+                else:
+                    response = getattr(client, method)(url, data)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertLess(response.status_code, 400, msg=name)
+            captured[name] = [query['sql'] for query in queries]
+        set_uploads(user=user, year=YEAR, month=MONTH, date=1,
+                    photo=0, video=0)
+        return captured
+
+    def test_every_url_has_budget(self):
+        from photos.urls import urlpatterns
+        self.assertEqual({pattern.name for pattern in urlpatterns},
+                         set(BUDGETS))
+        self.assertEqual(set(REQUESTS), set(BUDGETS))
+
+    def test_budgets(self):
+        measured = {scale: self.measure(stocks)
+                    for scale, stocks in SCALES.items()}
+        for name, budget in BUDGETS.items():
+            with self.subTest(name=name):
+                small = measured['small'][name]
+                large = measured['large'][name]
+                self.assertLessEqual(
+                    len(large), budget,
+                    msg=f'{name}: бюджет {budget}, выполнено:\n'
+                        + '\n'.join(large)
+                )
+                self.assertEqual(
+                    len(small), len(large),
+                    msg=f'{name}: число запросов растет с данными:\n'
+                        + '\n'.join(large)
+                )
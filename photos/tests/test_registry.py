@@ -0,0 +1,95 @@
+import time
+from unittest import mock
+
+from crum import impersonate
+from django import forms
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from photos.forms import StockCreateForm
+from photos.models import Stock, User
+from photos.tests.test_cache import LOCMEM_CACHE
+from photos.validators import validate_stock
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class StockRegistryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.other = User.objects.create(username='Other')
+        cls.stock = Stock.objects.create(
+            user=cls.user, name='Pond5', pseudo_name='P5'
+        )
+        Stock.objects.create(user=cls.other, name='Adobe',
+                             pseudo_name='AS')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def get_stock_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        stock_queries = [query['sql'] for query in queries.captured_queries
+                         if 'FROM "photos_stock"' in query['sql']]
+        return response, stock_queries
+
+    def test_choices_are_cached(self):
+        """Списки стоков на страницах берутся из кеша"""
+        for name in ('income', 'graphic', 'income_all'):
+            with self.subTest(name=name):
+                self.get_stock_queries(reverse(name))
+                response, queries = self.get_stock_queries(reverse(name))
+                self.assertEqual(queries, [])
+                self.assertContains(response, 'P5')
+
+    def test_create_and_delete_invalidate(self):
+        self.get_stock_queries(reverse('income'))
+        self.authorized_client.post(reverse('create_stock'),
+                                    {'name': 'Shutter',
+                                     'pseudo_name': 'SS'})
+        response, queries = self.get_stock_queries(reverse('income'))
+        self.assertTrue(queries)
+        self.assertContains(response, 'SS')
+        Stock.objects.get(user=self.user, name='Shutter').delete()
+        response, _ = self.get_stock_queries(reverse('income'))
+        self.assertNotContains(response, 'SS')
+
+    def test_cached_list_expires(self):
+        """Сток, созданный процессом, чей сброс кеша сюда не дошел,
+        появляется после истечения срока"""
+        self.get_stock_queries(reverse('income'))
+        # bulk_create не посылает сигналов, как запись в другом воркере
+        Stock.objects.bulk_create([Stock(user=self.user, name='Shutter',
+                                         pseudo_name='SS')])
+        response, _ = self.get_stock_queries(reverse('income'))
+        self.assertNotContains(response, 'SS')
+        later = time.time() + settings.PHOTOS_STOCKS_CACHE_TIMEOUT + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time',
+                        return_value=later):
+            response, _ = self.get_stock_queries(reverse('income'))
+        self.assertContains(response, 'SS')
+
+    def test_create_form_checks_only_own_stocks(self):
+        """Сток другого пользователя не мешает создать такой же"""
+        form = StockCreateForm(data={'name': 'Adobe', 'pseudo_name': 'AS'},
+                               instance=Stock(user=self.user))
+        self.assertTrue(form.is_valid())
+        form = StockCreateForm(data={'name': 'Pond5', 'pseudo_name': 'P5'},
+                               instance=Stock(user=self.user))
+        errors = {'name': ['Сток уже существует'],
+                  'pseudo_name': ['Псевдоним уже существует']}
+        self.assertEqual(form.errors, errors)
+
+    def test_validate_stock_checks_current_user(self):
+        with impersonate(self.user):
+            validate_stock('Adobe')
+            with self.assertRaises(forms.ValidationError):
+                validate_stock('P5')
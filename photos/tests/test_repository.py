@@ -0,0 +1,53 @@
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from photos.models import Stock, User, set_uploads
+from photos.repository import get_repository
+
+
+class RepositoryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.stock = Stock.objects.create(
+            user=cls.user, name='Pond5', pseudo_name='P5'
+        )
+        set_uploads(user=cls.user, year=2022, month=7, date=3,
+                    photo=2, video=1)
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def test_lookups_are_loaded_once(self):
+        """Повторные обращения за запрос не ходят в базу"""
+        repository = get_repository(self.request)
+        with self.assertNumQueries(3):  # месяц, дни и стоки
+            for _ in range(3):
+                month = repository.get_month(2022, 7)
+                day = repository.get_day(2022, 7, 3)
+                stock = repository.get_stock('Pond5')
+        self.assertIs(get_repository(self.request), repository)
+        self.assertEqual((month.year_list, day.photo, day.month),
+                         (2022, 2, month))
+        self.assertEqual(stock, self.stock)
+
+    def test_missing_entities(self):
+        repository = get_repository(self.request)
+        with self.assertNumQueries(1):
+            self.assertIsNone(repository.get_month(2021, 1).pk)
+            self.assertEqual(repository.get_days(2021, 1), {})
+            self.assertIsNone(repository.get_day(2021, 1, 5))
+        self.assertIsNone(repository.get_stock('Unknown'))
+
+    def test_month_page_reads_month_once(self):
+        client = Client()
+        client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse('months', args=(2022, 7)))
+        month_queries = [query['sql'] for query in queries.captured_queries
+                         if 'FROM "photos_month"' in query['sql']]
+        self.assertEqual(len(month_queries), 1)
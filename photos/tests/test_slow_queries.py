@@ -0,0 +1,88 @@
+from django.db.models import Q
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from photos.metrics import metrics
+from photos.models import SlowQuery, User, set_uploads
+from photos.slow_queries import REDACTED
+
+
+@override_settings(PHOTOS_SLOW_QUERY_THRESHOLD_MS=0)
+class SlowQueryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Anon')
+        cls.staff = User.objects.create(username='Staff', is_staff=True,
+                                        is_superuser=True)
+        set_uploads(user=cls.user, year=2022, month=7, date=3,
+                    photo=1, video=1)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_queries_are_recorded_with_plan(self):
+        """Запрос сохраняется с представлением, стеком и планом"""
+        self.authorized_client.get(reverse('months', args=(2022, 7)))
+        sample = SlowQuery.objects.get(sql__contains='FROM "photos_day"')
+        self.assertEqual(sample.view, 'months')
+        self.assertEqual(sample.path, '/2022/7/')
+        self.assertIn('photos/repository.py', sample.stack)
+        self.assertIn('day_month_cover_idx', sample.explain)
+        self.assertFalse(SlowQuery.objects.filter(
+            sql__contains='photos_slowquery'
+        ).exists())
+
+    def test_recording_not_counted_in_metrics(self):
+        """Запись образцов и планы не попадают в запросы представления"""
+        url = reverse('months', args=(2022, 7))
+        with override_settings(PHOTOS_SLOW_QUERY_THRESHOLD_MS=None):
+            metrics.clear()
+            client = Client()
+            client.force_login(self.user)
+            client.get(url)
+            queries = metrics.views['months'].queries
+        metrics.clear()
+        self.authorized_client.get(url)
+        self.assertTrue(SlowQuery.objects.exists())
+        self.assertEqual(metrics.views['months'].queries, queries)
+
+    def test_session_and_user_params_redacted(self):
+        """Параметры запросов к сессиям и пользователям не сохраняются"""
+        self.authorized_client.get(reverse('months', args=(2022, 7)))
+        samples = SlowQuery.objects.filter(
+            Q(sql__contains='"django_session"')
+            | Q(sql__contains='"auth_user"')
+        )
+        self.assertTrue(samples)
+        for sample in samples:
+            with self.subTest(sql=sample.sql):
+                self.assertEqual(sample.params, REDACTED)
+                self.assertEqual(sample.explain, '')
+
+    @override_settings(PHOTOS_SLOW_QUERY_LIMIT=3)
+    def test_buffer_is_bounded(self):
+        for _ in range(3):
+            self.authorized_client.get(reverse('months', args=(2022, 7)))
+        self.assertEqual(SlowQuery.objects.count(), 3)
+        self.assertEqual(SlowQuery.objects.last().view, 'months')
+
+    @override_settings(PHOTOS_SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled(self):
+        Client().get(reverse('index'))
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_admin_lists_samples(self):
+        self.authorized_client.get(reverse('months', args=(2022, 7)))
+        staff_client = Client()
+        staff_client.force_login(self.staff)
+        response = staff_client.get(
+            reverse('admin:photos_slowquery_changelist')
+        )
+        self.assertContains(response, 'months')
+        sample = SlowQuery.objects.first()
+        response = staff_client.get(
+            reverse('admin:photos_slowquery_change', args=(sample.pk,))
+        )
+        self.assertContains(response, sample.view)
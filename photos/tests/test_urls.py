@@ -27,7 +27,9 @@ class URLTests(TestCase):
         cls.stock = Stock.objects.create(
             user=cls.user, name='qwe', pseudo_name='qwe'
         )
-        cls.stock.day.set([cls.day, ])
+        cls.stock.day.set([cls.day, ],
+                          through_defaults={'user': cls.user,
+                                            'date': cls.day.full_date})
 
     def setUp(self):
         self.guest_client = Client()
@@ -26,19 +26,21 @@ class ViewsTest(TestCase):
                                          month_list=cls.month_no)
         cls.next_month = Month.objects.create(
             user=cls.user, year_list=cls.year, month_list=cls.month_no + 1)
-        cls.days = get_days(cls.month)
-        get_days(cls.next_month)
         cls.stock = Stock.objects.create(
             user=cls.user, name='Pond5', pseudo_name='Pond5'
         )
         cls.date = 15
-        cls.day = Day.objects.get(date=cls.date, month=cls.month)
-        StockCount.objects.create(
+        cls.day = Day.objects.create(date=cls.date, month=cls.month,
+                                     photo=cls.photo, video=cls.video)
+        cls.days = get_days(cls.month)
+        StockCount.objects.add(
             photo=cls.photo, video=cls.video, day=cls.day,
             stock=cls.stock, income=cls.income
         )
-        cls.next_day = Day.objects.get(date=cls.date, month=cls.next_month)
-        StockCount.objects.create(
+        cls.next_day = Day.objects.create(date=cls.date,
+                                          month=cls.next_month,
+                                          photo=0, video=0)
+        StockCount.objects.add(
             photo=cls.photo, video=cls.video, day=cls.next_day,
             stock=cls.stock, income=cls.income
         )
@@ -112,13 +114,50 @@ class ViewsTest(TestCase):
                                       'month': self.month_no})
         )
         month_obj = resp.context['month_obj']
-        days = list(resp.context['days'])
+        days = [(day.date, day.photo, day.video)
+                for day in resp.context['days']]
 
         self.assertEqual(month_obj, self.month)
-        self.assertListEqual(days, self.days)
+        self.assertListEqual(
+            days, [(day.date, day.photo, day.video) for day in self.days]
+        )
+        self.assertIn(self.day, resp.context['days'])
+
+    def test_get_requests_do_not_create_rows(self):
+        """Просмотр страниц не создает записей в базе"""
+        counts = (Month.objects.count(), Day.objects.count(),
+                  StockCount.objects.count())
+        self.authorized_client.get(
+            reverse('months', kwargs={'year': self.year + 1,
+                                      'month': self.month_no})
+        )
+        for graphic in ('daily', 'monthly', 'diagram'):
+            with self.subTest(graphic=graphic):
+                self.authorized_client.post(
+                    reverse('graphic'),
+                    data={'year': self.year - 1,
+                          'month': self.month_no,
+                          'graphic': graphic,
+                          'stock': self.stock.name}
+                )
+        self.authorized_client.post(
+            reverse('total'),
+            data={'year': self.year - 1, 'month': self.month_no}
+        )
+        self.assertEqual(counts, (Month.objects.count(), Day.objects.count(),
+                                  StockCount.objects.count()))
+
+    def test_input_value_rejects_missing_date(self):
+        response = self.authorized_client.post(
+            reverse('input', kwargs={'year': self.year,
+                                     'month': 2,
+                                     'date': 30}),
+            data={'photo': self.photo, 'video': self.video}
+        )
+        self.assertEqual(response.status_code, 404)
 
     def test_post_request_to_graphic_page(self):
-        graphics = {'daily': (0, self.date),
+        graphics = {'daily': (self.date - 1, self.date),
                     'monthly': (self.month_no, months[self.month_no]),
                     'diagram': (0, self.stock.pseudo_name)}
         data1_form = {'year': self.year, 'month': self.month_no}
@@ -134,10 +173,12 @@ class ViewsTest(TestCase):
                 )
                 form = response.context['form']
                 self.assertTrue(form.is_valid())
-                result = response.context['result']
-                self.assertEqual(result['photoes'][index[0]], self.photo)
-                self.assertEqual(result['videos'][index[0]], self.video)
-                self.assertEqual(result['incomes'][index[0]], self.income)
+                result = self.authorized_client.get(
+                    response.context['series_url']
+                ).json()
+                self.assertEqual(result['photo'][index[0]], self.photo)
+                self.assertEqual(result['video'][index[0]], self.video)
+                self.assertEqual(result['income'][index[0]], self.income)
                 self.assertEqual(result['labels'][index[0]], index[1])
 
     def test_post_request_to_total_page(self):
@@ -158,14 +199,17 @@ class ViewsTest(TestCase):
         self.assertEqual(
             response.context['stocks'][0][3], self.income
         )
+        result = self.authorized_client.get(
+            response.context['series_url']
+        ).json()
         self.assertEqual(
-            response.context['labels'][0], self.stock.pseudo_name
+            result['labels'][0], self.stock.pseudo_name
         )
         self.assertEqual(
-            response.context['photo'][0], self.photo
+            result['photo'][0], self.photo
         )
         self.assertEqual(
-            response.context['video'][0], self.video
+            result['video'][0], self.video
         )
 
     def check_header(self, response):
@@ -1,15 +1,37 @@
 from django.urls import path
 
-from . import views
+from . import api, metrics, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('<int:year>/<int:month>/', views.month, name='months'),
+    path('<int:year>/<int:month>/edit/',
+         views.month_edit,
+         name='month_edit'),
     path('<int:year>/<int:month>/<int:date>/',
          views.input_value,
          name='input'),
     path('income/', views.income, name='income'),
+    path('income/all/', views.income_all, name='income_all'),
+    path('import/', views.import_report, name='import_report'),
+    path('export/', views.export_report, name='export_report'),
     path('create_stock/', views.create_stock, name='create_stock'),
     path('graphic/', views.graphic, name='graphic'),
-    path('total/', views.total, name='total')
+    path('total/', views.total, name='total'),
+    path('metrics', metrics.metrics_view, name='metrics'),
+    path('api/daily/<path:stock>/<int:year>/<int:month>/',
+         api.daily_series,
+         name='api_daily'),
+    path('api/monthly/<path:stock>/<int:year>/',
+         api.monthly_series,
+         name='api_monthly'),
+    path('api/diagram/<int:year>/<int:month>/',
+         api.diagram_series,
+         name='api_diagram'),
+    path('api/total/<int:year>/<int:month>/',
+         api.total_series,
+         name='api_total'),
+    path('api/day/<int:year>/<int:month>/<int:date>/',
+         api.day_cell,
+         name='api_day'),
 ]
@@ -1,4 +1,6 @@
+from crum import get_current_user
 from django import forms
+from django.db.models import Q
 
 from .models import Stock
 
@@ -12,9 +14,11 @@ def validate_not_empty(value):
 
 
 def validate_stock(value):
-    name_exists = Stock.objects.filter(name=value)
-    pseudo_exists = Stock.objects.filter(pseudo_name=value)
-    if name_exists or pseudo_exists:
+    stocks = Stock.objects.filter(Q(name=value) | Q(pseudo_name=value))
+    user = get_current_user()
+    if user is not None and user.is_authenticated:
+        stocks = stocks.filter(user=user)
+    if stocks.exists():
         raise forms.ValidationError(
             'Сток уже существует',
             params={'value': value})
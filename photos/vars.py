@@ -22,6 +22,9 @@ graphics = (('daily', 'По дням'),
             ('monthly', 'По месяцам'),
             ('diagram', 'Доходы со всех стоков'))
 
+export_formats = (('csv', 'CSV'),
+                  ('xlsx', 'Excel'))
+
 stocks = (('Shutter', 'Shutter'),
           ('Adobe', 'Adobe'))
 
@@ -1,50 +1,103 @@
 import calendar
 import datetime
+import io
 import logging
-from datetime import datetime as dt
 
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
-from django.shortcuts import get_object_or_404, redirect, render
-
-from .forms import (GraphicForm, InputForm, MonthForm, StockCreateForm,
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from counter.log import log_event
+
+from .aggregates import get_month_totals, year_total
+from .conditional import period_etag, period_last_modified
+from .export import CONTENT_TYPES, EXPORT_FORMATS, export_rows, get_sales
+from .forms import (DayFormSet, ExportForm, GraphicForm, ImportForm, InputForm,
+                    MonthForm, SaleDateForm, SaleRowFormSet, StockCreateForm,
                     StockForm)
-from .models import Day, Month, Stock, StockCount
+from .importer import SalesImportError, import_sales
+from .models import (Day, Stock, StockCount, get_or_create_day,
+                     set_month_uploads, set_uploads)
+from .repository import get_repository
 from .vars import header_names
 from .vars import months_list as months
 from .vars import total_header
 
 current_month = datetime.datetime.now().month - 1
 current_year = datetime.datetime.now().year
-logger = logging.getLogger('django')
+logger = logging.getLogger(__name__)
 
 
 @login_required
 def index(request):
     header_form = MonthForm(request.POST or None)
-    logger.warning(f'Home page { dt.now() }')
+    log_event(logger, 'home_page', user=request.user.pk)
     if 'header_button' in request.POST:
         return go_to_month(request, header_form)
-    return render(request, 'index.html', {'month': months[current_month],
-                                          'month_number': current_month,
-                                          'year': current_year,
-                                          'header_form': header_form})
+    return render(request, 'index.html',
+                  {'month': months[current_month],
+                   'month_number': current_month,
+                   'year': current_year,
+                   'header_form': header_form,
+                   'year_total': year_total(user=request.user,
+                                            year=current_year)})
 
 
 @login_required
+@cache_control(private=True, max_age=0)
+@condition(etag_func=period_etag, last_modified_func=period_last_modified)
 def month(request, year, month):
-    curr_month = get_month(user=request.user, year=year, month=month)
-    days = get_days(curr_month)
+    repository = get_repository(request)
+    curr_month = repository.get_month(year, month)
+    days = get_days(curr_month, repository.get_days(year, month))
     header_form = MonthForm(request.POST or None)
     if 'header_button' in request.POST:
         return go_to_month(request, header_form)
-    logger.warning(f'Month { month } of { year }, days={ days }. { dt.now() }')
+    log_event(logger, 'month_page', user=request.user.pk, year=year,
+              month=month, saved_days=sum(1 for day in days if day.pk))
     return render(request, 'month.html', {'year': year,
                                           'month': months[month - 1],
                                           'header_form': header_form,
                                           'header_names': header_names,
                                           'month_obj': curr_month,
-                                          'days': days})
+                                          'days': days,
+                                          'totals': get_upload_totals(days)})
+
+
+@login_required
+def month_edit(request, year, month):
+    check_date(year=year, month=month, date=1)
+    repository = get_repository(request)
+    curr_month = repository.get_month(year, month)
+    days = get_days(curr_month, repository.get_days(year, month))
+    month_days = [day for day in days if day.date]
+    formset = DayFormSet(request.POST or None,
+                         initial=[{'photo': day.photo or 0,
+                                   'video': day.video or 0}
+                                  for day in month_days])
+    header_form = MonthForm(request.POST or None)
+    if 'header_button' in request.POST:
+        return go_to_month(request, header_form)
+    if formset.is_valid():
+        uploads = get_changed_uploads(formset, month_days)
+        if uploads:
+            set_month_uploads(user=request.user, year=year, month=month,
+                              uploads=uploads)
+        log_event(logger, 'month_grid_saved', user=request.user.pk,
+                  year=year, month=month, changed_days=len(uploads))
+        return redirect('months', year=year, month=month)
+    day_forms = dict(zip((day.date for day in month_days), formset.forms))
+    cells = [(day, day_forms.get(day.date)) for day in days]
+    return render(request, 'month_edit.html', {'year': year,
+                                               'month': months[month - 1],
+                                               'month_number': month,
+                                               'header_form': header_form,
+                                               'header_names': header_names,
+                                               'formset': formset,
+                                               'cells': cells})
 
 
 @login_required
@@ -56,15 +109,12 @@ def input_value(request, year, month, date):
     if form.is_valid():
         photo = form.cleaned_data['photo']
         video = form.cleaned_data['video']
-        month_obj = get_month(user=request.user, year=year, month=month)
-        get_days(month=month_obj)
-        day = get_object_or_404(Day, month=month_obj, date=date)
-        day.photo = photo
-        day.video = video
-        day.save()
-        logger.warning(f'Input downloads: date = { date }.{ month }.{ year }'
-                       f', counts: photo = { photo }, video = { video },'
-                       f' income = { income }. { dt.now() }')
+        check_date(year=year, month=month, date=date)
+        set_uploads(user=request.user, year=year, month=month, date=date,
+                    photo=photo, video=video)
+        log_event(logger, 'uploads_saved', user=request.user.pk,
+                  date=f'{year}-{month:02}-{date:02}', photo=photo,
+                  video=video)
         return redirect('months', year=year, month=month)
     return render(request, 'income.html', {'form': form,
                                            'header_form': header_form,
@@ -87,28 +137,16 @@ def income(request):
         photo = form.cleaned_data['photo']
         video = form.cleaned_data['video']
         income = form.cleaned_data['income']
-        stock = Stock.objects.get(user=request.user,
-                                  name=form.cleaned_data['stock'])
-        month_obj = get_month(user=request.user, year=year, month=month)
-        get_days(month=month_obj)
-        day = Day.objects.filter(date=date, month=month_obj).last()
-        count = StockCount.objects.filter(day=day,
-                                          stock=stock)
-        if not count:
-            count = StockCount.objects.create(photo=photo,
-                                              video=video,
-                                              day=day,
-                                              stock=stock,
-                                              income=income)
-            count.save()
-        else:
-            count[0].video += video
-            count[0].photo += photo
-            count[0].income += income
-            count[0].save()
-        logger.warning(f'changing income: { choosen_day }, video = { video }'
-                       f', photo = { photo }, income = { income }.'
-                       f'{ dt.now() }')
+        stock = get_repository(request).get_stock(form.cleaned_data['stock'])
+        day = get_or_create_day(user=request.user,
+                                year=year,
+                                month=month,
+                                date=date)
+        StockCount.objects.add(stock=stock, day=day, photo=photo,
+                               video=video, income=income)
+        log_event(logger, 'sales_added', user=request.user.pk,
+                  date=choosen_day, stock=stock.name, photo=photo,
+                  video=video, income=income)
         return redirect('index')
     return render(request, 'income.html', {'form': form,
                                            'header_form': header_form,
@@ -116,17 +154,119 @@ def income(request):
                                            'month': months[current_month]})
 
 
+@login_required
+def income_all(request):
+    if request.method == 'POST':
+        # закешированный список мог устареть: строки проверяются по базе
+        stocks = list(Stock.objects.filter(user=request.user).order_by('pk'))
+    else:
+        stocks = get_repository(request).get_stocks()
+    form = SaleDateForm(request.POST or None)
+    formset = SaleRowFormSet(request.POST or None,
+                             initial=[{'stock': stock.pk}
+                                      for stock in stocks],
+                             form_kwargs={'stocks': {stock.pk: stock
+                                                     for stock in stocks}})
+    header_form = MonthForm(request.POST or None)
+    if 'header_button' in request.POST:
+        return go_to_month(request, header_form)
+    if form.is_valid() and formset.is_valid():
+        choosen_day = form.cleaned_data['date']
+        sales = {}
+        for row in formset.cleaned_data:
+            stock = row['stock']
+            values = (row.get('photo') or 0,
+                      row.get('video') or 0,
+                      row.get('income') or 0)
+            if any(values):
+                sales[stock.pk, choosen_day] = values
+        StockCount.objects.add_many(request.user, sales)
+        log_event(logger, 'sales_added_for_all', user=request.user.pk,
+                  date=choosen_day, stocks=len(sales))
+        return redirect('index')
+    return render(request, 'income_all.html',
+                  {'form': form,
+                   'rows': [(row.selected_stock, row)
+                            for row in formset.forms],
+                   'formset': formset,
+                   'header_form': header_form,
+                   'year': current_year,
+                   'month': months[current_month]})
+
+
+@login_required
+def import_report(request):
+    form = ImportForm(request.POST or None, request.FILES or None)
+    form.fields['stock'].choices = [('', '---------'),
+                                    *get_stock_list(request)]
+    header_form = MonthForm(request.POST or None)
+    if 'header_button' in request.POST:
+        return go_to_month(request, header_form)
+    stats = None
+    if form.is_valid():
+        report = io.TextIOWrapper(form.cleaned_data['file'].file,
+                                  encoding='utf-8-sig', newline='')
+        try:
+            stats = import_sales(user=request.user, stream=report,
+                                 stock=form.cleaned_data['stock'])
+        except (SalesImportError, UnicodeDecodeError) as error:
+            form.add_error('file', str(error))
+        else:
+            log_event(logger, 'sales_imported', user=request.user.pk,
+                      rows=stats.rows, imported=stats.imported,
+                      duplicates=stats.duplicates, rejected=stats.rejected)
+    return render(request, 'import.html', {'form': form,
+                                           'stats': stats,
+                                           'header_form': header_form,
+                                           'year': current_year,
+                                           'month': months[current_month]})
+
+
+@login_required
+def export_report(request):
+    form = ExportForm(request.GET or None)
+    form.fields['stock'].choices = [('', 'Все стоки'),
+                                    *get_stock_list(request)]
+    header_form = MonthForm(request.POST or None)
+    if 'header_button' in request.POST:
+        return go_to_month(request, header_form)
+    if form.is_valid():
+        export_format = form.cleaned_data['format']
+        sales = get_sales(user=request.user,
+                          date_from=form.cleaned_data['date_from'],
+                          date_to=form.cleaned_data['date_to'],
+                          stock=form.cleaned_data['stock'])
+        response = StreamingHttpResponse(
+            EXPORT_FORMATS[export_format](export_rows(sales)),
+            content_type=CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="sales.{export_format}"'
+        )
+        log_event(logger, 'sales_exported', user=request.user.pk,
+                  format=export_format,
+                  date_from=form.cleaned_data['date_from'],
+                  date_to=form.cleaned_data['date_to'],
+                  stock=form.cleaned_data['stock'])
+        return response
+    return render(request, 'export.html', {'form': form,
+                                           'header_form': header_form,
+                                           'year': current_year,
+                                           'month': months[current_month]})
+
+
 @login_required
 def create_stock(request):
-    form = StockCreateForm(request.POST or None)
+    form = StockCreateForm(request.POST or None,
+                           instance=Stock(user=request.user))
     header_form = MonthForm(request.POST or None)
     if 'header_button' in request.POST:
         return go_to_month(request, header_form)
     if form.is_valid():
-        form.instance.user = request.user
         form.save()
-        logger.warning(f'stock created: name = { form.cleaned_data["name"] }'
-                       f', pseudo_name = { form.cleaned_data["pseudo_name"] }')
+        log_event(logger, 'stock_created', user=request.user.pk,
+                  name=form.cleaned_data['name'],
+                  pseudo_name=form.cleaned_data['pseudo_name'])
         return redirect('index')
     return render(request, 'income.html', {'form': form,
                                            'header_form': header_form,
@@ -145,24 +285,15 @@ def graphic(request):
         chosen_month = int(form.cleaned_data['month'])
         chosen_year = form.cleaned_data['year']
         graphic = form.cleaned_data['graphic']
-        stock_name = form.cleaned_data['stock']
-        stock = get_object_or_404(Stock,
-                                  user=request.user,
-                                  name=stock_name)
-        month = get_month(user=request.user,
-                          year=chosen_year,
-                          month=chosen_month)
-        if graphic == 'daily':
-            result = month_graphic(month=month, stock=stock)
-        elif graphic == 'monthly':
-            result = year_graphic(year=chosen_year, stock=stock)
-        elif graphic == 'diagram':
-            result = month_diagram(request=request, month=month)
+        stock = form.cleaned_data['stock']
         context = {'form': form,
                    'header_form': header_form,
                    'year': current_year,
                    'month': months[current_month],
-                   'result': result}
+                   'series_url': get_series_url(graphic=graphic,
+                                                stock=stock,
+                                                year=int(chosen_year),
+                                                month=chosen_month)}
         return render(request, 'graphic.html', context)
     return render(request, 'income.html', {'form': form,
                                            'header_form': header_form,
@@ -176,128 +307,78 @@ def total(request):
     header_form = MonthForm(request.POST or None)
     if 'header_button' in request.POST:
         return go_to_month(request, header_form)
-    stocks_table = []
-    labels = []
-    photoes_count = []
-    video_count = []
-    incomes = []
     if form.is_valid():
-        month = get_month(user=request.user,
-                          year=form.cleaned_data['year'],
-                          month=form.cleaned_data['month'])
-        days = get_days(month=month)
-        stock_list = Stock.objects.filter(user=request.user)
-        for stock in stock_list:
-            counts = get_counts(days=days, stock=stock)
-            append_incomes(video_count, photoes_count, incomes, counts)
-            stock_line = [stock.pseudo_name,
-                          photoes_count[-1],
-                          video_count[-1],
-                          incomes[-1]]
-            labels.append(stock.pseudo_name)
-            stocks_table.append(stock_line)
+        year = int(form.cleaned_data['year'])
+        month = int(form.cleaned_data['month'])
+        totals = get_month_totals(user=request.user, year=year, month=month)
+        stocks_table = [[total['pseudo_name'],
+                         total['photo'],
+                         total['video'],
+                         total['income']] for total in totals]
         return render(request, 'total.html',
                       {'header_form': header_form,
                        'year': current_year,
                        'month': months[current_month],
                        'stocks': stocks_table,
                        'header_cells': total_header,
-                       'labels': labels,
-                       'photo': photoes_count,
-                       'video': video_count})
+                       'series_url': reverse('api_total',
+                                             args=(year, month))})
     return render(request, 'income.html', {'form': form,
                                            'header_form': header_form,
                                            'year': current_year,
                                            'month': months[current_month]})
 
 
-def get_month(user, year, month):
-    curr_month = Month.objects.filter(user=user,
-                                      month_list=month,
-                                      year_list=year).last()
-    if not curr_month:
-        curr_month = Month.objects.create(user=user,
-                                          month_list=month,
-                                          year_list=year)
-    return curr_month
-
-
-def get_days(month):
-    curr_days = Day.objects.filter(month=month)
-    if not curr_days:
-        curr_days = []
-        dates = calendar.monthcalendar(year=int(month.year_list),
-                                       month=int(month.month_list))
-        days = [Day(date=date, month=month, photo=0, video=0)
-                for week in dates for date in week]
-        with transaction.atomic():
-            for day in days:
-                day.save()
-                curr_days.append(day)
-    return curr_days
-
-
-def get_counts(days, stock):
-    month_counts = StockCount.objects.filter(stock=stock, day__in=days)
-    if not month_counts:
-        counts = [StockCount(stock=stock, day=day, photo=0, video=0, income=0)
-                  for day in days]
-        month_counts = StockCount.objects.bulk_create(counts)
-    return month_counts
-
-
-def month_graphic(month, stock):
-    days = get_days(month=month)
-    counts = get_counts(days=days, stock=stock)
-    photoes = [count.photo for count in counts]
-    videos = [count.video for count in counts]
-    incomes = [count.income for count in counts]
-    dates = [count.day.date for count in counts]
-    result = {'photoes': photoes,
-              'videos': videos,
-              'incomes': incomes,
-              'labels': dates}
-    return result
-
-
-def year_graphic(year, stock):
-    photoes = []
-    videos = []
-    incomes = []
-    for month_num in range(12):
-        month = get_month(user=stock.user, year=year, month=month_num + 1)
-        days = get_days(month=month)
-        counts = get_counts(days=days, stock=stock)
-        append_incomes(videos, photoes, incomes, counts)
-    labels = [months[month] for month in range(12)]
-    result = {'photoes': photoes,
-              'videos': videos,
-              'incomes': incomes,
-              'labels': labels}
-    return result
-
-
-def month_diagram(request, month):
-    stocks = Stock.objects.filter(user=request.user)
-    labels = []
-    videos = []
-    photoes = []
-    incomes = []
-    for stock in stocks:
-        days = get_days(month=month)
-        counts = get_counts(days=days, stock=stock)
-        append_incomes(videos, photoes, incomes, counts)
-        labels.append(stock.pseudo_name)
-    result = {'photoes': photoes,
-              'videos': videos,
-              'incomes': incomes,
-              'labels': labels}
-    return result
+def get_series_url(graphic, stock, year, month):
+    if graphic == 'daily':
+        return reverse('api_daily', args=(stock, year, month))
+    if graphic == 'monthly':
+        return reverse('api_monthly', args=(stock, year))
+    return reverse('api_diagram', args=(year, month))
+
+
+def get_days(month, saved_days=None):
+    if saved_days is None:
+        saved_days = {}
+        if month.pk:
+            saved_days = {day.date: day for day in
+                          Day.objects.filter(month=month, date__gt=0)}
+    dates = calendar.monthcalendar(year=int(month.year_list),
+                                   month=int(month.month_list))
+    return [saved_days.get(date) or Day(date=date, month=month,
+                                        photo=0, video=0)
+            for week in dates for date in week]
+
+
+def get_upload_totals(days):
+    return {'photo': sum(day.photo or 0 for day in days),
+            'video': sum(day.video or 0 for day in days)}
+
+
+def get_changed_uploads(formset, days):
+    """Загрузки только для измененных ячеек сетки месяца."""
+    uploads = {}
+    for form, day in zip(formset.forms, days):
+        saved = (day.photo or 0, day.video or 0)
+        photo = form.cleaned_data.get('photo')
+        video = form.cleaned_data.get('video')
+        value = (saved[0] if photo is None else photo,
+                 saved[1] if video is None else video)
+        if value != saved:
+            uploads[day.date] = value
+    return uploads
+
+
+def check_date(year, month, date):
+    if not 1 <= month <= 12:
+        raise Http404('Такого месяца нет в календаре')
+    if not 1 <= date <= calendar.monthrange(year, month)[1]:
+        raise Http404('Такой даты нет в календаре')
 
 
 def go_to_month(request, header_form):
     if header_form.is_valid():
-        logger.warning('redirect to month')
+        log_event(logger, 'redirect_to_month', user=request.user.pk)
         return redirect('months',
                         int(header_form.cleaned_data['year']),
                         int(header_form.cleaned_data['month']))
@@ -305,12 +386,6 @@ def go_to_month(request, header_form):
 
 
 def get_stock_list(request):
-    stock_list = Stock.objects.filter(user=request.user)
+    stock_list = get_repository(request).get_stocks()
     stocks = ((stock.name, stock.pseudo_name) for stock in stock_list)
     return stocks
-
-
-def append_incomes(videos, photoes, incomes, counts):
-    photoes.append(sum([int(count.photo) for count in counts]))
-    videos.append(sum([int(count.video) for count in counts]))
-    incomes.append(sum([float(count.income) for count in counts]))